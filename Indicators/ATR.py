@@ -1,35 +1,154 @@
-import pandas as pd
+import math
+
+import numpy as np
+
+from Indicators.MA import RollingMean, rolling_mean
+from utils.Instrumentation import instrumentation
+from utils.OHLC import OHLC
+
+
+def true_range(high, low, close):
+    """Compute the True Range of float arrays; the first row falls back to High-Low."""
+    tr = high - low
+    prev_close = close[:-1]
+    np.maximum(tr[1:], np.abs(high[1:] - prev_close), out=tr[1:])
+    np.maximum(tr[1:], np.abs(low[1:] - prev_close), out=tr[1:])
+    return tr
+
+
+def has_missing(candle):
+    """Whether any field of a candle is None or NaN, i.e. whether `calculate_ATR` drops its row."""
+    return any(value is None or value != value for value in candle.values())
+
+
+def ewm_step(average, value, alpha):
+    """One step of `Series.ewm(alpha=alpha, adjust=False).mean()`, with pandas' exact arithmetic."""
+    if value == average:
+        return average
+    alpha = 1 / (1 + (1 - alpha) / alpha)  # pandas goes through the center of mass
+    return ((1 - alpha) * average + alpha * value) / ((1 - alpha) + alpha)
+
+
+def smoothed_average(values, period, alpha):
+    """
+    Exponentially smooth `values`, seeded with the expanding mean of the first `period` rows.
+
+    After the seed this is `Series.ewm(alpha=alpha, adjust=False).mean()`, which `ATR.update`
+    replays with `ewm_step`.
+    """
+    import pandas as pd
+
+    average = rolling_mean(values, period)
+    if len(values) <= period:
+        return average
+    smoothed = pd.Series(np.r_[average[period - 1], values[period:]]).ewm(alpha=alpha, adjust=False).mean()
+    return np.r_[average[:period - 1], smoothed.to_numpy()]
+
+
+def average_true_range(tr, ATR_period, method='sma'):
+    """ATR of a True Range array without NaN."""
+    if method == 'sma':
+        return rolling_mean(tr, ATR_period)
+    alpha = 1 / ATR_period if method == 'wilder' else 2 / (ATR_period + 1)
+    return smoothed_average(tr, ATR_period, alpha)
+
 
 class ATR:
-    def __init__(self):
-        pass  # No need to initialize ATR_period globally
+    methods = ('sma', 'wilder', 'ema')
+
+    def __init__(self, ATR_period=None, method='sma'):
+        """
+        Args:
+            ATR_period (int): Period of the streaming `update` API; not needed by `calculate_ATR`.
+            method (str): Smoothing of the streaming ATR, see `calculate_ATRs`.
+        """
+        if method not in self.methods:
+            raise ValueError(f"Unsupported ATR method: {method}")
+        self.ATR_period = ATR_period
+        self.method = method
+        self.rolling = RollingMean(ATR_period) if ATR_period else None
+        self.prev_close = None
+        self.count = 0
+        self.value = math.nan
+
+    def update(self, candle):
+        """
+        Add one candle and return the latest ATR, equal to `calculate_ATR` on the full history.
+
+        Candles with a missing value in any field are skipped, as the batch version
+        drops their rows (see `has_missing`), and the previous ATR is returned.
+
+        Args:
+            candle (Mapping): The new candle with 'ask_h', 'ask_l' and 'ask_c'.
+        """
+        if self.rolling is None:
+            raise ValueError("ATR_period must be given to the constructor to use update().")
+        if has_missing(candle):
+            return self.value
+        high, low, close = (float(candle[col]) for col in ('ask_h', 'ask_l', 'ask_c'))
+
+        tr = high - low
+        if self.prev_close is not None:
+            tr = max(tr, abs(high - self.prev_close), abs(low - self.prev_close))
+        self.prev_close = close
+        self.count += 1
 
-    def calculate_ATR(self, ATR_period, df):
+        average = self.rolling.update(tr)
+        if self.method == 'sma' or self.count <= self.ATR_period:
+            self.value = average
+        else:
+            alpha = 1 / self.ATR_period if self.method == 'wilder' else 2 / (self.ATR_period + 1)
+            self.value = ewm_step(self.value, tr, alpha)
+        return self.value
+
+    def calculate_ATR(self, ATR_period, df, method='sma'):
         """Calculate the Average True Range (ATR) for the given DataFrame."""
-        # Ensure columns are numeric
-        df['ask_h'] = pd.to_numeric(df['ask_h'], errors='coerce')
-        df['ask_l'] = pd.to_numeric(df['ask_l'], errors='coerce')
-        df['ask_c'] = pd.to_numeric(df['ask_c'], errors='coerce')
+        return self.calculate_ATRs([ATR_period], df, method)
 
-        # Handle NaN values
-        df.dropna(inplace=True)
+    @instrumentation.timed('ATR.calculate_ATR')
+    def calculate_ATRs(self, ATR_periods, df, method='sma'):
+        """
+        Calculate the ATR for several periods from one True Range pass.
+
+        Rows with missing or non-numeric values are dropped from `df` and the
+        index is reset, as before, but the ask columns keep their original dtype
+        and no intermediate columns are written. An `OHLC` container keeps all its
+        rows: the ATR columns are appended with NaN on the rows that would be dropped.
 
-        # Calculate True Range components
-        df['High-Low'] = df['ask_h'] - df['ask_l']
-        df['High-Close'] = abs(df['ask_h'] - df['ask_c'].shift(1))
-        df['Low-Close'] = abs(df['ask_l'] - df['ask_c'].shift(1))
-        df['TrueRange'] = df[['High-Low', 'High-Close', 'Low-Close']].max(axis=1)
+        Args:
+            ATR_periods (iterable of int): ATR periods; each becomes an `ATR{period}` column.
+            df (pd.DataFrame or OHLC): The candles containing 'ask_h', 'ask_l' and 'ask_c'.
+            method (str): 'sma' (rolling mean with expanding warm-up), 'wilder'
+                (smoothing factor 1/period) or 'ema' (smoothing factor 2/(period+1)).
+        """
+        import pandas as pd
 
-        # Initialize ATR column
-        df[f'ATR{ATR_period}'] = 0.0
+        if method not in self.methods:
+            raise ValueError(f"Unsupported ATR method: {method}")
 
-        # Compute ATR dynamically for the first `ATR_period` rows
-        for i in range(len(df)):
-            window_size = min(i + 1, ATR_period)  # Dynamically adjust the window size
-            df.at[i, f'ATR{ATR_period}'] = df['TrueRange'].iloc[:i + 1].rolling(window=window_size).mean().iloc[-1]
+        high, low, close = (
+            np.asarray(pd.to_numeric(df[col], errors='coerce'), dtype=np.float64)
+            for col in ('ask_h', 'ask_l', 'ask_c')
+        )
 
-        # Drop intermediate columns
-        df.drop(['High-Low', 'High-Close', 'Low-Close', 'TrueRange'], axis=1, inplace=True)
+        if isinstance(df, OHLC):
+            valid = df.valid() & ~np.isnan(high + low + close)
+            tr = true_range(high[valid], low[valid], close[valid])
+            for ATR_period in ATR_periods:
+                values = np.full(len(df), np.nan)
+                values[valid] = average_true_range(tr, ATR_period, method)
+                df.add(f'ATR{ATR_period}', values)
+            return df
+
+        # Handle NaN values
+        valid = df.notna().all(axis=1).to_numpy() & ~np.isnan(high + low + close)
+        if not valid.all():
+            df.drop(df.index[~valid], inplace=True)
+            high, low, close = high[valid], low[valid], close[valid]
         df.reset_index(drop=True, inplace=True)
 
+        tr = true_range(high, low, close)
+        for ATR_period in ATR_periods:
+            df[f'ATR{ATR_period}'] = average_true_range(tr, ATR_period, method)
+
         return df
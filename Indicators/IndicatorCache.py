@@ -0,0 +1,192 @@
+import hashlib
+import os
+import time
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from Indicators.ATR import average_true_range, true_range
+from Indicators.MA import rolling_mean
+
+
+def fingerprint(*arrays):
+    """Hash the dtype, shape and contents of arrays into a short hex digest."""
+    digest = hashlib.blake2b(digest_size=16)
+    for array in arrays:
+        array = np.ascontiguousarray(array)
+        digest.update(f"{array.dtype.str}{array.shape}".encode())
+        digest.update(array.view(np.uint8).reshape(-1))
+    return digest.hexdigest()
+
+
+class IndicatorCache:
+    def __init__(self, max_bytes=256 * 2 ** 20, cache_dir=None, max_disk_bytes=None):
+        """
+        Memoize indicator results by a fingerprint of their input columns and their parameters.
+
+        Nothing is written to the DataFrames passed in: results are returned as
+        read-only arrays, so the cached copy can't be changed by the caller. The
+        memory tier evicts the least recently used results once they take more
+        than `max_bytes`; results are also stored as `.npy` files in `cache_dir`,
+        when given, and read back (memory-mapped) on a later miss. The disk tier
+        is bounded by `max_disk_bytes` after every write, least recently used
+        files first; `evict` trims it by size and/or age on demand.
+
+        Args:
+            max_bytes (int): Memory budget of the cached results.
+            cache_dir (str): Directory of the optional disk tier.
+            max_disk_bytes (int): Size budget of the disk tier; None leaves it unbounded.
+        """
+        self.max_bytes = max_bytes
+        self.max_disk_bytes = max_disk_bytes
+        self.cache_dir = os.path.expanduser(cache_dir) if cache_dir else None
+        if self.cache_dir:
+            os.makedirs(self.cache_dir, exist_ok=True)
+        self.entries = OrderedDict()
+        self.nbytes = 0
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    def _disk_path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.npy")
+
+    def _remember(self, key, values):
+        if values.nbytes > self.max_bytes:
+            return
+        self.entries[key] = values
+        self.nbytes += values.nbytes
+        while self.nbytes > self.max_bytes:
+            _, evicted = self.entries.popitem(last=False)
+            self.nbytes -= evicted.nbytes
+
+    def cached(self, name, params, inputs, compute):
+        """
+        Return the result of `compute()`, computing it only once for the same inputs.
+
+        Args:
+            name (str): Name of the indicator.
+            params (tuple): Parameters of the indicator.
+            inputs (iterable of np.ndarray): Arrays the result depends on.
+            compute (callable): Computes the result as an np.ndarray.
+        """
+        key = f"{name}-{'-'.join(map(str, params))}-{fingerprint(*inputs)}"
+        if key in self.entries:
+            self.hits += 1
+            self.entries.move_to_end(key)
+            return self.entries[key]
+
+        if self.cache_dir and os.path.exists(self._disk_path(key)):
+            self.disk_hits += 1
+            os.utime(self._disk_path(key))  # The modification time records the last access
+            values = np.load(self._disk_path(key), mmap_mode='r')
+        else:
+            self.misses += 1
+            values = np.asarray(compute())
+            values.flags.writeable = False
+            if self.cache_dir:
+                tmp_path = self._disk_path(key) + '.tmp.npy'
+                np.save(tmp_path, values)
+                os.replace(tmp_path, self._disk_path(key))
+                if self.max_disk_bytes is not None:
+                    self.evict(max_bytes=self.max_disk_bytes)
+        self._remember(key, values)
+        return values
+
+    def MA(self, df, MA_size):
+        """Moving average of 'ask_c', equal to the `ma{MA_size}` column of `MA.calculate_MA`."""
+        close = pd.to_numeric(df['ask_c'], errors='coerce').to_numpy(dtype=np.float64)
+        return self.cached('MA', (MA_size,), [close], lambda: rolling_mean(close, MA_size))
+
+    def ATR(self, df, ATR_period, method='sma'):
+        """
+        ATR aligned with the rows of `df`, NaN on the rows `ATR.calculate_ATR` drops.
+
+        The values of the kept rows equal the `ATR{ATR_period}` column of `ATR.calculate_ATR`.
+        """
+        high, low, close = (
+            pd.to_numeric(df[col], errors='coerce').to_numpy(dtype=np.float64)
+            for col in ('ask_h', 'ask_l', 'ask_c')
+        )
+        valid = df.notna().all(axis=1).to_numpy() & ~np.isnan(high + low + close)
+
+        def compute():
+            values = np.full(len(df), np.nan)
+            tr = true_range(high[valid], low[valid], close[valid])
+            values[valid] = average_true_range(tr, ATR_period, method)
+            return values
+
+        return self.cached(f'ATR_{method}', (ATR_period,), [high, low, close, valid], compute)
+
+    def with_indicators(self, df, MA_sizes=(), ATR_periods=(), ATR_method='sma'):
+        """
+        Return a copy of `df` with `ma{size}` and `ATR{period}` columns from the cache.
+
+        The result equals calling `MA.calculate_MA` and then `ATR.calculate_ATR` on a
+        copy of `df`, including dropping the rows the ATR can't be computed on.
+        """
+        result = df.reset_index(drop=True).assign(**{f'ma{size}': self.MA(df, size) for size in MA_sizes})
+        if not ATR_periods:
+            return result
+        # Validity is checked on every column, the moving averages included, as calculate_ATR does
+        columns = {f'ATR{period}': self.ATR(result, period, ATR_method) for period in ATR_periods}
+        result = result.assign(**columns)
+        return result[~np.isnan(columns[f'ATR{ATR_periods[0]}'])].reset_index(drop=True)
+
+    def info(self):
+        """Return the cache statistics."""
+        return {
+            'entries': len(self.entries),
+            'bytes': self.nbytes,
+            'hits': self.hits,
+            'disk_hits': self.disk_hits,
+            'misses': self.misses,
+        }
+
+    def _disk_entries(self):
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            if name.endswith('.npy') and not name.endswith('.tmp.npy'):
+                stat = os.stat(os.path.join(self.cache_dir, name))
+                entries.append((stat.st_mtime, stat.st_size, name))
+        return sorted(entries)
+
+    def evict(self, max_bytes=None, max_age=None):
+        """
+        Delete disk-tier results by age and/or total size.
+
+        Args:
+            max_bytes (int): Remove least recently used results until the disk tier fits in this size.
+            max_age (float): Remove results not accessed for more than this many seconds.
+
+        Returns:
+            list: Keys of the removed results.
+        """
+        if not self.cache_dir:
+            return []
+        entries = self._disk_entries()
+        removed = []
+        if max_age is not None:
+            cutoff = time.time() - max_age
+            removed += [name for accessed, _, name in entries if accessed < cutoff]
+            entries = [entry for entry in entries if entry[0] >= cutoff]
+        if max_bytes is not None:
+            total = sum(size for _, size, _ in entries)
+            for _, size, name in entries:
+                if total <= max_bytes:
+                    break
+                removed.append(name)
+                total -= size
+        for name in removed:
+            os.remove(os.path.join(self.cache_dir, name))
+        return [name[:-len('.npy')] for name in removed]
+
+    def clear(self, disk=False):
+        """Empty the memory tier and, with `disk`, delete the disk tier's files."""
+        self.entries.clear()
+        self.nbytes = 0
+        if disk and self.cache_dir:
+            for name in os.listdir(self.cache_dir):
+                if name.endswith('.npy'):
+                    os.remove(os.path.join(self.cache_dir, name))
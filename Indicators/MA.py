@@ -1,20 +1,244 @@
-import pandas as pd
+import math
+from collections import deque
+
+import numpy as np
+
+from utils.Instrumentation import instrumentation
+from utils.OHLC import OHLC
+
+
+def missing_counts(values):
+    """Running count of the NaNs in `values`, with one leading zero; shared by every `rolling_mean` over them."""
+    missing = np.zeros(len(values) + 1, dtype=np.int64)
+    np.cumsum(np.isnan(values), out=missing[1:])
+    return missing
+
+
+def rolling_mean(values, window, warmup=True, missing=None):
+    """Compute a rolling mean of length `window` over `values`.
+
+    With `warmup` the first `window - 1` rows use an expanding mean (the
+    behaviour of `MA.calculate_MA`); otherwise they are NaN like
+    `Series.rolling(window).mean()`. Any window containing a NaN is NaN.
+    The sums are pandas' own rolling sums, so the result is bit-identical to
+    the original row-by-row `calculate_MA` loop.
+
+    Args:
+        values (array-like): The series to average.
+        window (int): Length of the window.
+        warmup (bool): Average the first `window - 1` rows over the rows so far.
+        missing (np.ndarray): `missing_counts(values)`, to share it between windows.
+    """
+    import pandas as pd
+
+    if window < 1:
+        raise ValueError("window must be a positive integer.")
+    values = np.asarray(values, dtype=np.float64)
+    if missing is None:
+        missing = missing_counts(values)
+    mean = pd.Series(values).rolling(window, min_periods=1 if warmup else window).mean().to_numpy()
+    first = np.maximum(np.arange(len(values)) + 1 - window, 0)
+    return np.where(missing[1:] > missing[first], np.nan, mean)
+
+
+def prefix_sums(values):
+    """Running sum of `values` minus their first valid value, NaNs counted as zero, with one leading zero.
+
+    Returns:
+        tuple: (sums, offset); the offset keeps the sums small, so window sums
+        taken as differences of two of them lose little precision.
+    """
+    valid = values[~np.isnan(values)]
+    offset = float(valid[0]) if len(valid) else 0.0
+    sums = np.zeros(len(values) + 1, dtype=np.float64)
+    np.cumsum(np.where(np.isnan(values), 0.0, values - offset), out=sums[1:])
+    return sums, offset
+
+
+def prefix_rolling_mean(sums, offset, missing, window, warmup=True):
+    """`rolling_mean` from shared `prefix_sums` and `missing_counts`, in O(n) whatever the window.
+
+    The values agree with `rolling_mean` only to rounding, not bit for bit: the error
+    grows with the length of the series, about 1e-13 relative over a year of M5
+    candles. A crossover of two averages that are (nearly) equal can therefore differ.
+    """
+    if window < 1:
+        raise ValueError("window must be a positive integer.")
+    end = np.arange(1, len(sums))
+    first = np.maximum(end - window, 0)
+    mean = offset + (sums[end] - sums[first]) / (end - first)
+    nan = missing[end] > missing[first]
+    if not warmup:
+        nan |= end < window
+    return np.where(nan, np.nan, mean)
+
+
+class RollingMean:
+    def __init__(self, window, warmup=True):
+        """
+        O(1) streaming counterpart of `rolling_mean`.
+
+        It replays the same pandas rolling sums with `RollingWindowMean`, so every
+        value is bit-identical to the batch result at the same row.
+        """
+        self.average = RollingWindowMean(window, min_periods=1 if warmup else window)
+
+    def update(self, value):
+        """Add the next value and return the mean of the window ending at it."""
+        mean = self.average.update(value)
+        if self.average.nobs < len(self.average.values):  # A NaN in the window
+            return math.nan
+        return mean
+
+
+class RollingWindowMean:
+    def __init__(self, window, min_periods=None):
+        """
+        Streaming mirror of `Series.rolling(window, min_periods).mean()`.
+
+        It replays pandas' compensated (Kahan) add/remove steps and its
+        constant-window shortcut on the last `window` values, so every value,
+        and therefore every crossover comparison, is bit-identical to the
+        batch column, ties included. Windows with fewer than `min_periods`
+        (default `window`) values other than NaN are NaN.
+        """
+        if window < 1:
+            raise ValueError("window must be a positive integer.")
+        self.window = window
+        self.min_periods = window if min_periods is None else min_periods
+        self.values = deque()
+        self.started = False
+
+    def _reset(self, value):
+        self.values.clear()
+        self.nobs = self.neg_ct = 0
+        self.sum_x = self.compensation_add = self.compensation_remove = 0.0
+        self.prev_value = value
+        self.num_consecutive_same_value = 0
+        self.started = True
+
+    def _add(self, value):
+        if value == value:
+            self.nobs += 1
+            y = value - self.compensation_add
+            t = self.sum_x + y
+            self.compensation_add = t - self.sum_x - y
+            self.sum_x = t
+            if math.copysign(1.0, value) < 0:
+                self.neg_ct += 1
+            if value == self.prev_value:
+                self.num_consecutive_same_value += 1
+            else:
+                self.num_consecutive_same_value = 1
+            self.prev_value = value
+
+    def _remove(self, value):
+        if value == value:
+            self.nobs -= 1
+            y = - value - self.compensation_remove
+            t = self.sum_x + y
+            self.compensation_remove = t - self.sum_x - y
+            self.sum_x = t
+            if math.copysign(1.0, value) < 0:
+                self.neg_ct -= 1
+
+    def update(self, value):
+        """Add the next value and return the mean of the window ending at it."""
+        value = float(value)
+        if not self.started or self.window == 1:
+            self._reset(value)
+        elif len(self.values) == self.window:
+            self._remove(self.values.popleft())
+        self.values.append(value)
+        self._add(value)
+
+        if self.nobs < self.min_periods or self.nobs == 0:
+            return math.nan
+        if self.num_consecutive_same_value >= self.nobs:
+            return self.prev_value
+        result = self.sum_x / self.nobs
+        if (self.neg_ct == 0 and result < 0) or (self.neg_ct == self.nobs and result > 0):
+            return 0.0
+        return result
+
 
 class MA:
-    def __init__(self):
-        pass  # No need for initialization parameters
+    def __init__(self, MA_size=None):
+        """
+        Args:
+            MA_size (int): Window of the streaming `update` API; not needed by `calculate_MA`.
+        """
+        self.MA_size = MA_size
+        self.rolling = RollingMean(MA_size) if MA_size else None
+        self.value = math.nan
+
+    def update(self, candle):
+        """
+        Add one candle and return the latest MA, equal to `calculate_MA` on the full history.
+
+        Args:
+            candle (Mapping): The new candle, e.g. a dict or DataFrame row, with 'ask_c'.
+        """
+        if self.rolling is None:
+            raise ValueError("MA_size must be given to the constructor to use update().")
+        self.value = self.rolling.update(candle['ask_c'])
+        return self.value
 
+    @instrumentation.timed('MA.calculate_MA')
     def calculate_MA(self, MA_size, df):
-        """Calculate Moving Average (MA) dynamically and include it in the DataFrame."""
-        # Initialize MA column
-        df[f'ma{MA_size}'] = 0.0
+        """
+        Calculate Moving Average (MA) dynamically and include it in the DataFrame.
 
-        # Compute MA dynamically for the first `MA_size` rows
-        for i in range(len(df)):
-            window_size = min(i + 1, MA_size)  # Dynamically adjust the window size
-            df.at[i, f'ma{MA_size}'] = df['ask_c'].iloc[:i + 1].rolling(window=window_size).mean().iloc[-1]
+        An `OHLC` container gets the `ma{MA_size}` column appended instead, without
+        touching its other arrays.
+        """
+        import pandas as pd
+
+        close = pd.to_numeric(df['ask_c'], errors='coerce')
+        if isinstance(df, OHLC):
+            return df.add(f'ma{MA_size}', rolling_mean(close, MA_size))
+        df[f'ma{MA_size}'] = rolling_mean(close, MA_size)
 
         # No need to drop rows, as we handle dynamic calculation
         df.reset_index(drop=True, inplace=True)
 
         return df
+
+    @instrumentation.timed('MA.calculate_MAs')
+    def calculate_MAs(self, MA_sizes, df, exact=True):
+        """Calculate several Moving Averages sharing one conversion and NaN count of 'ask_c'.
+
+        By default every window is its own pandas rolling pass, O(n) per window, so
+        each column is bit-identical to `calculate_MA`. With `exact=False` all
+        windows are differences of one shared prefix-sum pass (`prefix_rolling_mean`):
+        cheaper for wide sweeps, but equal to `calculate_MA` only to rounding.
+
+        The result is returned as a separate DataFrame so wide sweeps don't fragment
+        `df`. An `OHLC` container gets the columns appended and is returned instead.
+
+        Args:
+            MA_sizes (iterable of int): Moving average windows, e.g. range(5, 201).
+            df (pd.DataFrame or OHLC): The candles containing the 'ask_c' column.
+            exact (bool): Match `calculate_MA` bit for bit rather than share the prefix sums.
+
+        Returns:
+            pd.DataFrame: One `ma{MA_size}` column per window, on a fresh RangeIndex.
+        """
+        import pandas as pd
+
+        close = np.asarray(pd.to_numeric(df['ask_c'], errors='coerce'), dtype=np.float64)
+        missing = missing_counts(close)
+        if exact:
+            def average(MA_size):
+                return rolling_mean(close, MA_size, missing=missing)
+        else:
+            sums, offset = prefix_sums(close)
+
+            def average(MA_size):
+                return prefix_rolling_mean(sums, offset, missing, MA_size)
+
+        if isinstance(df, OHLC):
+            for MA_size in MA_sizes:
+                df.add(f'ma{MA_size}', average(MA_size))
+            return df
+        return pd.DataFrame({f'ma{MA_size}': average(MA_size) for MA_size in MA_sizes})
@@ -1,52 +1,212 @@
-import pandas as pd
+import heapq
+from collections import deque
+
 import numpy as np
 
+from utils.Instrumentation import instrumentation
+
+
+def price_ticks(low, high, step):
+    """Map candle lows/highs onto the integer price grid `k * step`.
+
+    A candle covers every tick from `ceil(low / step)` to `floor(high / step)`. A
+    candle too narrow to touch a grid level covers the single tick nearest its
+    midpoint, so every candle counts once. Candles with missing prices get an
+    empty range (first tick greater than last tick).
+    """
+    low = np.asarray(low, dtype=np.float64)
+    high = np.asarray(high, dtype=np.float64)
+    missing = np.isnan(low) | np.isnan(high)
+    low, high = np.where(missing, 1.0, low), np.where(missing, 0.0, high)
+    # Round before ceil/floor so 1.085 / 0.001 lands on tick 1085, not 1084.
+    lo = np.ceil(np.round(low / step, 6)).astype(np.int64)
+    hi = np.floor(np.round(high / step, 6)).astype(np.int64)
+    narrow = (lo > hi) & ~missing
+    if narrow.any():
+        nearest = np.round((low[narrow] + high[narrow]) / (2 * step)).astype(np.int64)
+        lo[narrow] = hi[narrow] = nearest
+    hi[missing] = lo[missing] - 1
+    return lo, hi
+
+
+def top_levels(counts, top_k):
+    """Return positions of the `top_k` largest counts, highest first, ties by lowest position."""
+    if len(counts) > top_k:
+        threshold = np.partition(counts, len(counts) - top_k)[len(counts) - top_k]
+        above = np.flatnonzero(counts > threshold)
+        ties = np.flatnonzero(counts == threshold)[:top_k - len(above)]
+        selected = np.concatenate((above, ties))
+    else:
+        selected = np.arange(len(counts))
+    return selected[np.lexsort((selected, -counts[selected]))]
+
+
 class TPO:
-    def __init__(self):
-        pass
+    def __init__(self, NOfCandles=None, step=0.01, top_k=5):
+        """
+        Args:
+            NOfCandles (int): Window of the streaming `update` API; not needed by `calculate_TPO`.
+            step (float): Price distance between two TPO levels for `update`.
+            top_k (int): Number of levels returned by `update`.
+        """
+        self.NOfCandles = NOfCandles
+        self.step = step
+        self.top_k = top_k
+        self.window = deque()  # (lo, hi) ticks of the last NOfCandles candles
+        self.counts = {}  # Tick -> TPO count in the window, visited ticks only
+        self.heap = []  # (-count, tick) of every count change; outdated entries are skipped lazily
+        # Monotonic deques of (position, tick): the window's lowest low and highest high at the front
+        self.lows = deque()
+        self.highs = deque()
+        self.seen = 0
 
-    def calculate_TPO(self, df, NOfCandles, step=0.01):
-        """Calculate TPO using a sliding window and return a single DataFrame."""
-        if len(df) < NOfCandles:
-            raise ValueError("Not enough candles in the DataFrame to calculate TPO.")
+    def _move(self, lo, hi, sign):
+        for tick in range(lo, hi + 1):
+            count = self.counts.get(tick, 0) + sign
+            if count:
+                self.counts[tick] = count
+                heapq.heappush(self.heap, (-count, tick))
+            else:
+                del self.counts[tick]
+        if len(self.heap) > 4 * len(self.counts) + 64:
+            self.heap = [(-count, tick) for tick, count in self.counts.items()]
+            heapq.heapify(self.heap)
 
-        # Prepare a list to store results
-        all_results = []
+    def _top_levels(self):
+        """(tick, count) of the `top_k` most visited ticks of the window, as `top_levels` orders them."""
+        top, taken = [], set()
+        while self.heap and len(top) < self.top_k:
+            count, tick = heapq.heappop(self.heap)
+            if tick not in taken and self.counts.get(tick) == -count:
+                top.append((tick, -count))
+                taken.add(tick)
+        for tick, count in top:
+            heapq.heappush(self.heap, (-count, tick))
 
-        # Iterate over each candle with a sliding window
-        for i in range(NOfCandles, len(df)):
-            # Select the last NOfCandles before the current candle
-            df_window = df.iloc[i - NOfCandles:i]
+        # Fewer visited ticks than top_k: the unvisited ticks of the range follow, lowest first
+        if len(top) < self.top_k and self.lows:
+            tick, last = self.lows[0][1], self.highs[0][1]
+            while len(top) < self.top_k and tick <= last:
+                if tick not in self.counts:
+                    top.append((tick, 0))
+                tick += 1
+        return top
+
+    def update(self, candle):
+        """
+        Add one candle and return the profile of the `NOfCandles` candles before it.
 
-            # Determine the time of the current candle
-            current_time = df.iloc[i]['time']
+        The levels are exactly the `calculate_TPO` rows of this candle's time. The
+        histogram is updated with the ticks of the entering and leaving candles only,
+        and the window's price range is kept by monotonic deques, so a call costs
+        O((candle ticks + top_k) log ticks) whatever `NOfCandles` and the range.
 
-            # Determine price bins (min to max of high/low in the last N candles)
-            min_price = df_window['ask_l'].min()
-            max_price = df_window['ask_h'].max()
-            price_bins = np.arange(min_price, max_price + step, step)
+        Args:
+            candle (Mapping): The new candle with 'ask_h' and 'ask_l'.
 
-            # Initialize TPO counts for price bins
-            tpo_counts = {price: 0 for price in price_bins}
+        Returns:
+            list: (Price, TPO) pairs, most visited first, or None while fewer than
+            `NOfCandles` candles have been seen.
+        """
+        if self.NOfCandles is None:
+            raise ValueError("NOfCandles must be given to the constructor to use update().")
+        profile = None
+        if len(self.window) == self.NOfCandles:
+            top = self._top_levels()
+            prices = np.round(np.array([tick for tick, _ in top], dtype=np.int64) * self.step, 10)
+            profile = list(zip(prices.tolist(), [count for _, count in top]))
+            self._move(*self.window.popleft(), -1)
+            first = self.seen - self.NOfCandles
+            for extremes in (self.lows, self.highs):
+                if extremes and extremes[0][0] == first:
+                    extremes.popleft()
 
-            # Count TPO occurrences for each bin
-            for _, row in df_window.iterrows():
-                low, high = row['ask_l'], row['ask_h']
-                for price in price_bins:
-                    if low <= price <= high:
-                        tpo_counts[price] += 1
+        lo, hi = price_ticks([float(candle['ask_l'])], [float(candle['ask_h'])], self.step)
+        lo, hi = int(lo[0]), int(hi[0])
+        self.window.append((lo, hi))
+        if lo <= hi:
+            self._move(lo, hi, 1)
+            while self.lows and self.lows[-1][1] >= lo:
+                self.lows.pop()
+            self.lows.append((self.seen, lo))
+            while self.highs and self.highs[-1][1] <= hi:
+                self.highs.pop()
+            self.highs.append((self.seen, hi))
+        self.seen += 1
+        return profile
 
-            # Sort TPO counts by value
-            sorted_tpo = sorted(tpo_counts.items(), key=lambda x: x[1], reverse=True)
+    @instrumentation.timed('TPO.calculate_TPO')
+    def calculate_TPO(self, df, NOfCandles, step=0.01, top_k=5):
+        """
+        Calculate TPO using a sliding window and return a single DataFrame.
 
-            # Select only the top 30 levels
-            top_tpo = sorted_tpo[:5]
+        Price levels lie on the fixed grid `k * step`, see `price_ticks`; a candle
+        narrower than `step` counts at the level nearest its midpoint. The histogram
+        of the last `NOfCandles` candles is kept in a difference array over those
+        integer ticks, so moving the window only adds the entering candle and removes
+        the leaving one.
 
-            # Add the results to a single DataFrame
-            for price, tpo in top_tpo:
-                all_results.append({'Time': current_time, 'Price': price, 'TPO': tpo})
+        Every level between the window's lowest and highest tick is a candidate, so a
+        window spanning fewer than `top_k` levels reports only those. A window whose
+        candles all have missing prices reports no row.
+
+        Args:
+            df (pd.DataFrame or OHLC): The candles containing 'time', 'ask_h' and 'ask_l'.
+            NOfCandles (int): Number of candles before the current one in each profile.
+            step (float): Price distance between two TPO levels.
+            top_k (int): Number of most visited levels reported per candle.
+
+        Returns:
+            pd.DataFrame: 'Time', 'Price' and 'TPO' rows, at most `top_k` per candle, most visited first.
+        """
+        import pandas as pd
+
+        if len(df) < NOfCandles:
+            raise ValueError("Not enough candles in the DataFrame to calculate TPO.")
+
+        lo, hi = price_ticks(
+            pd.to_numeric(df['ask_l'], errors='coerce'),
+            pd.to_numeric(df['ask_h'], errors='coerce'),
+            step,
+        )
+        covered = lo <= hi
+        base = lo[covered].min() if covered.any() else 0
+        lo, hi = lo - base, hi - base
+
+        # Tick range of the window ending before each candle
+        window_lo = pd.Series(np.where(covered, lo, np.iinfo(np.int64).max)).rolling(NOfCandles).min().shift(1)
+        window_hi = pd.Series(np.where(covered, hi, -1)).rolling(NOfCandles).max().shift(1)
+        window_lo = window_lo.to_numpy()
+        window_hi = window_hi.to_numpy()
+
+        diff = np.zeros(max(hi.max(initial=0), 0) + 2, dtype=np.int64)
+
+        def move(k, sign):
+            if covered[k]:
+                diff[lo[k]] += sign
+                diff[hi[k] + 1] -= sign
+
+        for k in range(NOfCandles):
+            move(k, 1)
+
+        rows, levels, tpos = [], [], []
+        for i in range(NOfCandles, len(df)):
+            if window_lo[i] <= window_hi[i]:
+                first = int(window_lo[i])
+                counts = np.cumsum(diff[first:int(window_hi[i]) + 1])
+                selected = top_levels(counts, top_k)
+                rows.append(np.full(len(selected), i))
+                levels.append(selected + first)
+                tpos.append(counts[selected])
+            move(i, 1)
+            move(i - NOfCandles, -1)
 
-        # Convert the results to a single DataFrame
-        result_df = pd.DataFrame(all_results)
+        if not rows:
+            return pd.DataFrame(columns=['Time', 'Price', 'TPO'])
 
-        return result_df
+        rows = np.concatenate(rows)
+        return pd.DataFrame({
+            'Time': np.asarray(df['time'])[rows],
+            'Price': np.round((np.concatenate(levels) + base) * step, 10),
+            'TPO': np.concatenate(tpos),
+        })
@@ -0,0 +1,167 @@
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from Indicators.TPO import price_ticks, top_levels
+from utils.Instrumentation import instrumentation
+from utils.TimeFrames import time_ns
+
+
+def utc_times(time):
+    """Candle times as naive UTC datetime64[ns], the form the index stores and searches."""
+    return time_ns(time).view('datetime64[ns]')
+
+
+class TPOIndex:
+    arrays = ('time', 'lo', 'hi', 'checkpoints')
+
+    def __init__(self, time, lo, hi, checkpoints, base, step, checkpoint):
+        """
+        Precomputed market profile of a candle series for arbitrary time-range queries.
+
+        Prices lie on the grid `k * step`, as in `TPO`. Every `checkpoint` candles the
+        index stores the TPO count of every level over all the candles before; the
+        profile of a range is the difference of two checkpoints plus the fewer than
+        `2 * checkpoint` candles at its ends, so a query costs O(levels + checkpoint)
+        whatever the length of the range. Build it with `from_df`, or `load` a saved one.
+
+        Args:
+            time (np.ndarray): Sorted candle times, see `utc_times`.
+            lo, hi (np.ndarray): First and last tick (relative to `base`) covered by each candle.
+            checkpoints (np.ndarray): (len(time) // checkpoint + 1, levels) cumulative counts.
+            base (int): Tick of the lowest level.
+            step (float): Price distance between two levels.
+            checkpoint (int): Candles between two stored histograms.
+        """
+        self.time = time
+        self.lo = lo
+        self.hi = hi
+        self.checkpoints = checkpoints
+        self.base = base
+        self.step = step
+        self.checkpoint = checkpoint
+
+    @classmethod
+    @instrumentation.timed('TPOIndex.from_df')
+    def from_df(cls, df, step=0.01, checkpoint=256):
+        """
+        Index the candles of `df`.
+
+        Args:
+            df (pd.DataFrame or OHLC): Time-ordered candles with 'time', 'ask_h' and 'ask_l'.
+            step (float): Price distance between two TPO levels.
+            checkpoint (int): Candles between two stored histograms; smaller answers
+                queries faster and takes more memory.
+        """
+        lo, hi = price_ticks(
+            pd.to_numeric(df['ask_l'], errors='coerce'),
+            pd.to_numeric(df['ask_h'], errors='coerce'),
+            step,
+        )
+        covered = lo <= hi
+        base = int(lo[covered].min()) if covered.any() else 0
+        lo, hi = lo - base, hi - base
+        levels = int(hi[covered].max()) + 1 if covered.any() else 0
+
+        # Difference array of each block of candles, then counts per block, then running totals
+        n_checkpoints = len(lo) // checkpoint + 1
+        block = np.arange(len(lo))[covered] // checkpoint + 1
+        counts = np.zeros((n_checkpoints + 1, levels + 1), dtype=np.int32)
+        np.add.at(counts, (block, lo[covered]), 1)
+        np.add.at(counts, (block, hi[covered] + 1), -1)
+        counts = np.cumsum(np.cumsum(counts, axis=1), axis=0)[:n_checkpoints, :levels]
+
+        return cls(utc_times(df['time']), lo.astype(np.int32), hi.astype(np.int32), counts.astype(np.int32),
+                   base, step, checkpoint)
+
+    def save(self, path):
+        """Store the index in the directory `path`, one `.npy` file per array."""
+        path = os.path.expanduser(path)
+        os.makedirs(path, exist_ok=True)
+        for name in self.arrays:
+            np.save(os.path.join(path, f'{name}.npy'), getattr(self, name))
+        with open(os.path.join(path, 'meta.json'), 'w') as f:
+            json.dump({'base': self.base, 'step': self.step, 'checkpoint': self.checkpoint}, f)
+
+    @classmethod
+    def load(cls, path, mmap_mode='r'):
+        """Open an index written by `save`, memory-mapped by default."""
+        path = os.path.expanduser(path)
+        with open(os.path.join(path, 'meta.json')) as f:
+            meta = json.load(f)
+        arrays = {name: np.load(os.path.join(path, f'{name}.npy'), mmap_mode=mmap_mode) for name in cls.arrays}
+        return cls(**arrays, **meta)
+
+    def __len__(self):
+        return len(self.time)
+
+    def rows(self, start=None, end=None):
+        """Candle positions [first, stop) of the times `start <= time < end`; None leaves a side open."""
+        first = 0 if start is None else int(np.searchsorted(self.time, utc_times([start])[0]))
+        stop = len(self) if end is None else int(np.searchsorted(self.time, utc_times([end])[0]))
+        return first, max(first, stop)
+
+    def _add_candles(self, counts, first, stop):
+        lo, hi = self.lo[first:stop], self.hi[first:stop]
+        covered = lo <= hi
+        diff = np.zeros(counts.shape[0] + 1, dtype=np.int64)
+        np.add.at(diff, lo[covered], 1)
+        np.add.at(diff, hi[covered] + 1, -1)
+        counts += np.cumsum(diff[:-1])
+
+    def counts(self, first, stop):
+        """TPO count of every level over the candles at positions [first, stop)."""
+        k = self.checkpoint
+        left, right = -(-first // k), stop // k
+        if left < right:
+            counts = self.checkpoints[right].astype(np.int64) - self.checkpoints[left]
+            self._add_candles(counts, first, left * k)
+            self._add_candles(counts, right * k, stop)
+        else:
+            counts = np.zeros(self.checkpoints.shape[1], dtype=np.int64)
+            self._add_candles(counts, first, stop)
+        return counts
+
+    def _prices(self, ticks):
+        return np.round((ticks + self.base) * self.step, 10)
+
+    def profile(self, start=None, end=None):
+        """
+        Market profile of the candles with `start <= time < end`.
+
+        Returns:
+            pd.DataFrame: 'Price' and 'TPO' of every visited level, lowest price first.
+        """
+        counts = self.counts(*self.rows(start, end))
+        ticks = np.flatnonzero(counts)
+        return pd.DataFrame({'Price': self._prices(ticks), 'TPO': counts[ticks]})
+
+    def top_levels(self, start=None, end=None, top_k=10):
+        """
+        The `top_k` most visited levels of the candles with `start <= time < end`.
+
+        Returns:
+            pd.DataFrame: 'Price' and 'TPO', most visited first, ties by lowest price, as in `TPO`.
+        """
+        counts = self.counts(*self.rows(start, end))
+        ticks = np.flatnonzero(counts)
+        selected = ticks[top_levels(counts[ticks], top_k)]
+        return pd.DataFrame({'Price': self._prices(selected), 'TPO': counts[selected]})
+
+    def point_of_control(self, start=None, end=None):
+        """Return (price, TPO) of the most visited level, or None if no level was visited."""
+        levels = self.top_levels(start, end, top_k=1)
+        if not len(levels):
+            return None
+        return float(levels['Price'].iloc[0]), int(levels['TPO'].iloc[0])
+
+
+# Example usage:
+# Assuming `data` is your DataFrame with 'time', 'ask_h' and 'ask_l'.
+# index = TPOIndex.from_df(data, step=0.0001)
+# index.save('~/tpo/EUR_USD_M5')
+# index = TPOIndex.load('~/tpo/EUR_USD_M5')
+# print(index.top_levels(pd.Timestamp('2024-03-04', tz='UTC'), pd.Timestamp('2024-03-11', tz='UTC'), top_k=10))
+# print(index.point_of_control(pd.Timestamp('2024-03-04', tz='UTC')))
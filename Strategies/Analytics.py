@@ -0,0 +1,147 @@
+import numpy as np
+import pandas as pd
+
+from Strategies.TradeLog import TradeLog, columns
+from utils.TimeFrames import time_ns
+
+_year_ns = 365.25 * 86400 * 10 ** 9
+
+
+def trade_fields(trade_log):
+    """
+    Return the fields of a trade log as {field: np.ndarray}, see `TradeLog.columns`.
+
+    Args:
+        trade_log (TradeLog, np.ndarray or pd.DataFrame): A `TradeLog`, its `records()`
+            or the DataFrame `run_strategy` returns.
+    """
+    if isinstance(trade_log, TradeLog):
+        trade_log = trade_log.records()
+    if isinstance(trade_log, np.ndarray):
+        return {name: trade_log[name] for name in columns}
+    if not len(trade_log):
+        return {name: np.empty(0) for name in columns}
+    return {name: trade_log[column].to_numpy() for name, column in columns.items()}
+
+
+def equity_curve(trade_log, initial_capital):
+    """
+    Capital after every trade of a trade log, in the order the trades were settled.
+
+    Returns:
+        pd.DataFrame: 'Time' (the first trade's start, then each trade's end), 'Capital',
+        'Peak' (running maximum) and 'Drawdown' (fraction of the peak) with one row
+        more than the log, for the initial capital.
+    """
+    fields = trade_fields(trade_log)
+    capital = np.concatenate(([initial_capital], fields['total_capital'].astype(np.float64)))
+    peak = np.maximum.accumulate(capital)
+    time = pd.to_datetime(np.concatenate((fields['start_time'][:1], fields['end_time'])), utc=True)
+    return pd.DataFrame({'Time': time, 'Capital': capital, 'Peak': peak, 'Drawdown': (peak - capital) / peak})
+
+
+def batch_metrics(trade_logs, initial_capital):
+    """
+    Performance metrics of many trade logs, e.g. the runs of a parameter sweep, in one vectorized pass.
+
+    The logs are concatenated and every metric is reduced per log with `np.bincount` or a
+    grouped running maximum, so there is no Python loop over trades or logs. Returns are
+    per trade (profit over the capital before the trade); the Sharpe and Sortino ratios
+    are annualized by the number of trades per year, and NaN when the trades span no
+    time or the returns don't vary (no losing trade, for Sortino). Exposure is the fraction of the time
+    from the first entry to the last exit with at least one position open, whatever the
+    order of the trades in the log (the single-instrument engines log them in opening
+    order, `Portfolio` in exit order).
+
+    Args:
+        trade_logs (list or dict): Trade logs accepted by `trade_fields`; a dict's keys
+            become the index of the result.
+        initial_capital (float): Starting capital of every run.
+
+    Returns:
+        pd.DataFrame: One row per log with 'Final Capital', 'Total Return', 'Trades',
+        'Win Rate', 'Average Win', 'Average Loss', 'Expectancy', 'Profit Factor',
+        'Max Drawdown', 'Sharpe Ratio', 'Sortino Ratio' and 'Exposure'.
+    """
+    keys = list(trade_logs) if isinstance(trade_logs, dict) else range(len(trade_logs))
+    logs = [trade_fields(trade_logs[key]) for key in keys]
+    n_logs = len(logs)
+    trades = np.array([len(log['profit_loss']) for log in logs], dtype=np.int64)
+    log_id = np.repeat(np.arange(n_logs), trades)
+    fields = {name: np.concatenate([log[name] for log in logs]) if logs else np.empty(0) for name in columns}
+
+    profit = fields['profit_loss'].astype(np.float64)
+    capital = fields['total_capital'].astype(np.float64)
+    start, end = (time_ns(fields[name]) if len(profit) else np.empty(0, np.int64)
+                  for name in ('start_time', 'end_time'))
+
+    def per_log(values):
+        return np.bincount(log_id, weights=values, minlength=n_logs)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        wins = per_log(profit > 0)
+        losses = per_log(profit < 0)
+        gross_profit = per_log(np.where(profit > 0, profit, 0.0))
+        gross_loss = -per_log(np.where(profit < 0, profit, 0.0))
+        final_capital = np.where(trades > 0, capital[np.cumsum(trades) - 1] if len(capital) else 0.0,
+                                 initial_capital)
+
+        # Drawdown from the running peak of each log, the initial capital included
+        grouped = pd.Series(capital).groupby(log_id)
+        peak = np.maximum(grouped.cummax().to_numpy(), initial_capital)
+        max_drawdown = np.zeros(n_logs)
+        np.maximum.at(max_drawdown, log_id, (peak - capital) / peak)
+
+        # Per-trade returns and their annualized ratios
+        returns = profit / (capital - profit)
+        mean = per_log(returns) / trades
+        std = np.sqrt(per_log((returns - mean[log_id]) ** 2) / trades)
+        # Equal returns leave only rounding error in the deviation
+        std = np.where(std > 16 * np.finfo(np.float64).eps * np.abs(mean), std, 0.0)
+        downside = np.sqrt(per_log(np.minimum(returns, 0.0) ** 2) / trades)
+        first_start = np.full(n_logs, np.iinfo(np.int64).max)
+        last_end = np.full(n_logs, np.iinfo(np.int64).min)
+        np.minimum.at(first_start, log_id, start)
+        np.maximum.at(last_end, log_id, end)
+        span = np.where(trades > 0, last_end - first_start, 0).astype(np.float64)
+        annualization = np.sqrt(trades / (span / _year_ns))
+        # Undefined without elapsed time or without dispersion: NaN, not inf
+        sharpe = np.where((span > 0) & (std > 0), mean / std * annualization, np.nan)
+        sortino = np.where((span > 0) & (downside > 0), mean / downside * annualization, np.nan)
+
+        # Time in the market: the part of each trade not covered by one opened earlier
+        by_start = np.lexsort((start, log_id))
+        latest_end = pd.Series(end[by_start]).groupby(log_id[by_start]).cummax().groupby(log_id[by_start]).shift(1)
+        covered_from = np.maximum(start[by_start],
+                                  latest_end.fillna(np.iinfo(np.int64).min).to_numpy(dtype=np.int64))
+        exposure = np.bincount(log_id[by_start], weights=np.maximum(end[by_start] - covered_from, 0),
+                               minlength=n_logs) / span
+
+        metrics = pd.DataFrame({
+            'Final Capital': final_capital,
+            'Total Return': final_capital / initial_capital - 1,
+            'Trades': trades,
+            'Win Rate': wins / trades,
+            'Average Win': gross_profit / wins,
+            'Average Loss': -gross_loss / losses,
+            'Expectancy': (gross_profit - gross_loss) / trades,
+            'Profit Factor': gross_profit / gross_loss,
+            'Max Drawdown': max_drawdown,
+            'Sharpe Ratio': sharpe,
+            'Sortino Ratio': sortino,
+            'Exposure': exposure,
+        }, index=list(keys))
+    return metrics
+
+
+def trade_metrics(trade_log, initial_capital):
+    """Return the `batch_metrics` of a single trade log as a dict."""
+    return batch_metrics([trade_log], initial_capital).to_dict('records')[0]
+
+
+# Example usage:
+# trade_log_df = MACrossover(data, initial_capital=10000).run_strategy(20, 50)
+# print(trade_metrics(trade_log_df, 10000))
+# print(equity_curve(trade_log_df, 10000).tail())
+# logs = {params: MACrossover(data, 10000).run_strategy(*params) for params in [(10, 30), (20, 50)]}
+# print(batch_metrics(logs, 10000).sort_values('Sharpe Ratio', ascending=False))
@@ -0,0 +1,120 @@
+import numpy as np
+
+from utils.Instrumentation import instrumentation
+
+
+class ExitResolver:
+    def __init__(self, prices, block_size=64, high=None, max_cells=2 ** 22):
+        """
+        Find trade exits on a price array with a galloping block scan.
+
+        Args:
+            prices (array-like): Prices checked against stop-loss/take-profit, e.g. 'bid_c'.
+                With `high`, the candle lows checked against the lower level.
+            block_size (int): Size of the first block scanned; each further block doubles,
+                so short trades stay cheap and long ones take O(log n) NumPy calls.
+            high (array-like): Candle highs checked against the upper level.
+            max_cells (int): Most candles `first_exits` checks in one NumPy call, all
+                positions together; bounds its memory however many positions are open.
+        """
+        self.prices = np.asarray(prices, dtype=np.float64)
+        self.high = self.prices if high is None else np.asarray(high, dtype=np.float64)
+        self.block_size = block_size
+        self.max_cells = max_cells
+
+    def first_exits(self, starts, lower, upper):
+        """
+        Return, for every position, the first candle >= its start whose price leaves the
+        band (lower, upper), i.e. whose low is <= `lower` or whose high is >= `upper`,
+        as an int64 array with -1 where the band is never left.
+
+        A long position exits with lower=stop_loss and upper=take_profit, a short one
+        with lower=take_profit and upper=stop_loss. Every position still searching
+        checks its next block of candles in the same NumPy call, a (positions, block)
+        grid; the blocks double each round, but are narrowed so the grid never exceeds
+        `max_cells` values.
+        """
+        starts = np.asarray(starts, dtype=np.int64)
+        lower = np.asarray(lower, dtype=np.float64)
+        upper = np.asarray(upper, dtype=np.float64)
+        n = len(self.prices)
+        exits = np.full(len(starts), -1, dtype=np.int64)
+        position = starts.copy()
+        active = np.flatnonzero(position < n)
+        block = self.block_size
+        while len(active):
+            width = max(1, min(block, self.max_cells // len(active)))
+            rows = position[active, None] + np.arange(width)
+            inside = rows < n
+            np.minimum(rows, n - 1, out=rows)
+            hits = (self.prices[rows] <= lower[active, None]) | (self.high[rows] >= upper[active, None])
+            hits &= inside
+            if instrumentation.enabled:
+                instrumentation.count('exit-scan steps', int(np.count_nonzero(inside)))  # Candles examined
+            found = hits.any(axis=1)
+            exits[active[found]] = position[active[found]] + hits[found].argmax(axis=1)
+            position[active] += width
+            active = active[~found & (position[active] < n)]
+            block *= 2
+        return exits
+
+
+class IntrabarFill:
+    tie_breaks = ('stop_loss', 'take_profit', 'open')
+
+    def __init__(self, open_price, low, high, tie_break='stop_loss', block_size=64):
+        """
+        Fill stop-loss and take-profit orders on one side of the book (bid or ask)
+        using each candle's open, low and high.
+
+        A level is touched when the low reaches the lower level or the high reaches
+        the upper one. An order fills at its level, or at the candle's open when the
+        price gapped through the level between two candles.
+
+        Args:
+            open_price, low, high (array-like): Candle prices of the side the position
+                closes on: bid for longs, ask for shorts.
+            tie_break (str): Level assumed hit first when a candle touches both:
+                'stop_loss' (conservative), 'take_profit', or 'open' (the level closer
+                to the candle's open).
+            block_size (int): First block size of the exit scan, see `ExitResolver`.
+        """
+        if tie_break not in self.tie_breaks:
+            raise ValueError(f"Unsupported tie-break rule: {tie_break}")
+        self.open = np.asarray(open_price, dtype=np.float64)
+        self.resolver = ExitResolver(low, block_size, high=high)
+        self.tie_break = tie_break
+
+    def first_exits(self, starts, stop_loss, take_profit, long):
+        """
+        Find the first exit at or after each start, with one block scan for all positions.
+
+        Args:
+            starts (array-like): First candle checked; the entry candle when entering at its open.
+            stop_loss, take_profit (array-like): Levels of every position.
+            long (array-like): Whether each position is long (stop-loss below) or short.
+
+        Returns:
+            tuple: (exit positions, fill prices) arrays, -1 and NaN without exit.
+        """
+        stop_loss = np.asarray(stop_loss, dtype=np.float64)
+        take_profit = np.asarray(take_profit, dtype=np.float64)
+        long = np.asarray(long, dtype=bool)
+        lower = np.where(long, stop_loss, take_profit)
+        upper = np.where(long, take_profit, stop_loss)
+        exits = self.resolver.first_exits(starts, lower, upper)
+
+        j = np.maximum(exits, 0)
+        open_price = self.open[j]
+        hit_lower = self.resolver.prices[j] <= lower
+        hit_upper = self.resolver.high[j] >= upper
+        if self.tie_break == 'stop_loss':
+            tie = stop_loss
+        elif self.tie_break == 'take_profit':
+            tie = take_profit
+        else:
+            tie = np.where(open_price - lower <= upper - open_price, lower, upper)
+        price = np.where(hit_lower & hit_upper, tie, np.where(hit_lower, lower, upper))
+        # Gapped through a level: filled at the open
+        price = np.where((open_price <= lower) | (open_price >= upper), open_price, price)
+        return exits, np.where(exits >= 0, price, np.nan)
@@ -0,0 +1,116 @@
+import itertools
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+from Indicators.IndicatorCache import IndicatorCache
+from Strategies.Analytics import batch_metrics
+from Strategies.Registry import strategies
+from utils.OHLC import OHLC, attach, share
+
+# Read-only market data of a worker process, set once by `_init_worker`
+_worker_data = {}
+
+
+def _init_worker(data, strategy, initial_capital):
+    if not isinstance(data, OHLC):
+        # A `share` spec: the arrays stay in the parent's block, kept open while the worker lives
+        _worker_data['block'], data = attach(data)
+    _worker_data['df'] = data
+    _worker_data['strategy'] = strategy
+    _worker_data['initial_capital'] = initial_capital
+    # Configurations differing only in risk reuse the signals of their MA window
+    _worker_data['cache'] = IndicatorCache()
+
+
+def _run_config(config):
+    MA_window, risk_type, constant_risk = config
+    strategy = _worker_data['strategy'](_worker_data['df'], _worker_data['initial_capital'], risk_type,
+                                        indicator_cache=_worker_data['cache'])
+    MA_args = MA_window if isinstance(MA_window, tuple) else (MA_window,)
+    strategy.run_strategy(*MA_args, constant_risk=constant_risk if constant_risk is not None else 0.01)
+    # The compact records are sent back; the metrics of every run are computed at once
+    return strategy.trade_log.records()
+
+
+class ParameterSweep:
+    strategies = strategies
+
+    def __init__(self, df, initial_capital, strategy='MACrossover', max_workers=None):
+        """
+        Run a strategy over a grid of parameters on a process pool.
+
+        Only the columns the strategies read are shared with the workers, through one
+        shared memory block that every worker process maps instead of receiving a
+        pickled copy, and reused by every configuration it runs.
+
+        Args:
+            df (pd.DataFrame or OHLC): Market data with 'time', 'bid_o', 'bid_c' and an 'ATR*' column.
+            initial_capital (float): Starting capital of every run.
+            strategy (str): 'MACrossover' or 'PriceMACrossover'.
+            max_workers (int): Number of worker processes; 1 runs in the current process.
+        """
+        if strategy not in self.strategies:
+            raise ValueError(f"Unsupported strategy: {strategy}")
+        atr_column = [col for col in df.columns if col.startswith("ATR")][0]
+        columns = ['bid_o', 'bid_c', atr_column]
+        self.data = df.select(columns) if isinstance(df, OHLC) else OHLC.from_df(df, columns)
+        self.initial_capital = initial_capital
+        self.strategy = strategy
+        self.max_workers = max_workers or os.cpu_count()
+
+    def build_grid(self, MA_windows, risk_types=('constant',), constant_risks=(0.01,)):
+        """
+        Expand the parameter grid into (MA_window, risk_type, constant_risk) configurations.
+
+        `constant_risk` only applies to the 'constant' risk type, so other risk types
+        are run once per MA window with `constant_risk` set to None.
+        """
+        grid = []
+        for MA_window, risk_type in itertools.product(MA_windows, risk_types):
+            MA_window = tuple(MA_window) if isinstance(MA_window, (list, tuple)) else MA_window
+            if risk_type == 'constant':
+                grid.extend((MA_window, risk_type, risk) for risk in constant_risks)
+            else:
+                grid.append((MA_window, risk_type, None))
+        return grid
+
+    def run(self, MA_windows, risk_types=('constant',), constant_risks=(0.01,), chunksize=None):
+        """
+        Run every configuration of the grid and rank them by final capital.
+
+        Args:
+            MA_windows (iterable): (MA_minor, MA_major) pairs for MACrossover, or MA
+                periods for PriceMACrossover.
+            risk_types (iterable of str): 'constant' and/or 'altering_8_step'.
+            constant_risks (iterable of float): Risk percentages for the 'constant' risk type.
+            chunksize (int): Configurations sent to a worker at a time; defaults to an
+                even split into four chunks per worker.
+
+        Returns:
+            pd.DataFrame: One row per configuration with its `batch_metrics`, best final capital first.
+        """
+        grid = self.build_grid(MA_windows, risk_types, constant_risks)
+        strategy = self.strategies[self.strategy]
+
+        if self.max_workers == 1:
+            _init_worker(self.data, strategy, self.initial_capital)
+            try:
+                results = [_run_config(config) for config in grid]
+            finally:
+                _worker_data.clear()
+        else:
+            chunksize = chunksize or max(1, len(grid) // (4 * self.max_workers))
+            block, spec = share(self.data)
+            try:
+                with ProcessPoolExecutor(self.max_workers, initializer=_init_worker,
+                                         initargs=(spec, strategy, self.initial_capital)) as pool:
+                    results = list(pool.map(_run_config, grid, chunksize=chunksize))
+            finally:
+                block.close()
+                block.unlink()
+
+        table = pd.DataFrame(grid, columns=['MA', 'Risk Type', 'Constant Risk'])
+        table = pd.concat([table, batch_metrics(results, self.initial_capital)], axis=1)
+        return table.sort_values('Final Capital', ascending=False, kind='stable').reset_index(drop=True)
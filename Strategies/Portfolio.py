@@ -0,0 +1,214 @@
+import heapq
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from Indicators.ATR import ATR
+from Strategies.Registry import strategies
+from Strategies.Strategy import RiskManagement
+from utils.Instrumentation import instrumentation
+from utils.OHLC import OHLC
+from utils.TimeFrames import time_ns
+
+
+def load_instrument(source, cache_dir=None):
+    """
+    Load the candles of one instrument as an `OHLC` container, without copying a DataFrame.
+
+    Args:
+        source: An `OHLC` container, a DataFrame, the path of a candle CSV, or the keyword arguments of a
+            `DataGeneration` to download the candles with.
+        cache_dir (str): Serve downloads through a `CandleCache` in this directory.
+    """
+    if isinstance(source, OHLC):
+        return source
+    if isinstance(source, pd.DataFrame):
+        return OHLC.from_df(source)
+    if isinstance(source, (str, os.PathLike)):
+        return OHLC.from_df(pd.read_csv(source, float_precision='round_trip'))
+
+    from utils.DataGeneration import DataGeneration
+    data_generation = DataGeneration(**source)
+    if cache_dir is not None:
+        from utils.CandleCache import CandleCache
+        return OHLC.from_df(CandleCache(cache_dir).get_instruments_df(data_generation))
+    return OHLC.from_df(data_generation.get_instruments_df())
+
+
+def _instrument_trades(task):
+    """Load an instrument, compute its indicators and resolve the positions its signals open."""
+    name, source, strategy, params, ATR_period, ATR_method, cache_dir = task
+    data = load_instrument(source, cache_dir)
+    if not any(col.startswith("ATR") for col in data.columns):
+        ATR().calculate_ATR(ATR_period, data, ATR_method)
+
+    backtest = strategies[strategy](data, 0, 'constant')
+    backtest.calculate_signals(*params)
+    trades = backtest.resolve_trades()
+
+    entry, exit = trades['entry'], trades['exit']
+    closed = exit >= 0
+    times = backtest.times
+    ns = time_ns(times)
+    exit_ns = np.full(len(exit), np.iinfo(np.int64).max)
+    exit_ns[closed] = ns[exit[closed]]
+    end_time = np.full(len(exit), None, dtype=object)
+    end_time[closed] = times[exit[closed]]
+    return name, backtest.tz, {
+        'entry_ns': ns[entry],
+        'exit_ns': exit_ns,
+        'start_time': times[entry],
+        'end_time': end_time,
+        'long': trades['long'],
+        'entry_price': trades['entry_price'],
+        'exit_price': trades['exit_price'],
+        'stop_distance': np.abs(trades['entry_price'] - trades['stop_loss']),
+    }
+
+
+def _worker_trades(task):
+    """`_instrument_trades` in a worker process, returned with what the worker's instrumentation recorded."""
+    enabled, task = task
+    if not enabled:
+        return _instrument_trades(task), None
+    with instrumentation.capture():
+        result = _instrument_trades(task)
+    return result, instrumentation.report()
+
+
+class Portfolio(RiskManagement):
+    def __init__(self, instruments, initial_capital, risk_type='constant', strategy='MACrossover',
+                 max_open_risk=None, ATR_period=15, ATR_method='sma', cache_dir=None, max_workers=None):
+        """
+        Run a strategy over a basket of instruments with one shared capital.
+
+        Each instrument is loaded, its indicators computed and its positions resolved
+        in a worker process; only the positions come back. They are then merged by
+        entry time into one event stream and sized in that order from the shared
+        capital. A position's profit or loss is booked when it exits, so a position
+        is sized only with the outcome of the positions that exited before it opened,
+        and the trade log lists the trades in exit order.
+
+        Args:
+            instruments (dict): Instrument name to candle source, see `load_instrument`.
+                Sources without an 'ATR*' column get `ATR{ATR_period}` computed.
+            initial_capital (float): Starting capital shared by every instrument.
+            risk_type (str): The type of risk management ('constant' or 'altering_8_step').
+            strategy (str): 'MACrossover' or 'PriceMACrossover'.
+            max_open_risk (float): Skip a position when the loss at the stop-loss of every
+                position still open, plus its own, would exceed this fraction of the capital.
+            ATR_period (int): ATR period for instruments without an ATR column.
+            ATR_method (str): 'sma', 'wilder' or 'ema'.
+            cache_dir (str): `CandleCache` directory for downloaded instruments.
+            max_workers (int): Number of worker processes; 1 runs in the current process.
+        """
+        if strategy not in strategies:
+            raise ValueError(f"Unsupported strategy: {strategy}")
+        super().__init__(initial_capital, risk_type)
+        self.instruments = dict(instruments)
+        self.strategy = strategy
+        self.max_open_risk = max_open_risk
+        self.ATR_period = ATR_period
+        self.ATR_method = ATR_method
+        self.cache_dir = cache_dir
+        self.max_workers = max_workers or os.cpu_count()
+        self.skipped_trades = 0
+        self.trade_instruments = []  # Instrument of every logged trade
+
+    def resolve_trades(self, *params):
+        """
+        Resolve the positions of every instrument, in parallel.
+
+        The trade log takes the time zone of the instruments' times.
+
+        Returns:
+            dict: Instrument name to the arrays of its positions in opening order.
+        """
+        tasks = [(name, source, self.strategy, params, self.ATR_period, self.ATR_method, self.cache_dir)
+                 for name, source in self.instruments.items()]
+        if self.max_workers == 1 or len(tasks) == 1:
+            results = list(map(_instrument_trades, tasks))
+        else:
+            with ProcessPoolExecutor(min(self.max_workers, len(tasks))) as pool:
+                reported = list(pool.map(_worker_trades, [(instrumentation.enabled, task) for task in tasks]))
+            # Timers and counters of the workers would otherwise be lost with their processes
+            for _, report in reported:
+                if report is not None:
+                    instrumentation.merge(report)
+            results = [result for result, _ in reported]
+        self.trade_log.tz = next((tz for _, tz, _ in results if tz is not None), None)
+        return {name: trades for name, _, trades in results}
+
+    def merge_trades(self, trades):
+        """Merge the positions of every instrument into one table ordered by entry time."""
+        if not trades:
+            raise ValueError("No instrument trades to merge.")
+        names = list(trades)
+        merged = {key: np.concatenate([trades[name][key] for name in names]) for key in trades[names[0]]}
+        counts = [len(trades[name]['entry_ns']) for name in names]
+        merged['instrument'] = np.repeat(np.array(names, dtype=object), counts)
+        # Stable, so positions entered together keep the instrument order
+        order = np.argsort(merged['entry_ns'], kind='stable')
+        return {key: values[order] for key, values in merged.items()}
+
+    def _exit(self, events, position):
+        """Book the profit or loss of a position taken by `settle` and return the risk it releases."""
+        _, k, risk, risk_per_trade = position
+        if not np.isnan(events['exit_price'][k]):
+            self.close_trade("long" if events['long'][k] else "short", events['entry_price'][k],
+                             events['exit_price'][k], risk_per_trade, events['start_time'][k],
+                             events['end_time'][k])
+            self.trade_instruments.append(events['instrument'][k])
+        return risk
+
+    def settle(self, events):
+        """
+        Size the merged positions from the shared capital, within the risk budget, and log them as they exit.
+
+        Exits are kept in a heap by exit time and booked only once an entry comes after
+        them, so the capital and the risk ladder a position is sized with never include
+        the outcome of a position still open.
+        """
+        open_risk = 0.0
+        open_positions = []  # Heap of (exit time, event, risk, risk per trade) of the positions taken
+        for k in range(len(events['entry_ns'])):
+            entry_ns = events['entry_ns'][k]
+            # A position exits on a candle's close, so it still counts at that candle's open
+            while open_positions and open_positions[0][0] < entry_ns:
+                open_risk -= self._exit(events, heapq.heappop(open_positions))
+
+            risk_per_trade = self.size_trade()
+            risk = events['stop_distance'][k] * risk_per_trade
+            if self.max_open_risk is not None and open_risk + risk > self.max_open_risk * self.current_capital:
+                self.skipped_trades += 1
+                continue
+            open_risk += risk
+            heapq.heappush(open_positions, (events['exit_ns'][k], k, risk, risk_per_trade))
+
+        while open_positions:
+            self._exit(events, heapq.heappop(open_positions))
+
+    def run_strategy(self, *params, constant_risk=0.01):
+        """
+        Run the strategy on every instrument and return the portfolio trade log.
+
+        Args:
+            *params: (MA_minor, MA_major) for MACrossover or (MA,) for PriceMACrossover.
+            constant_risk (float): Risk percentage for constant risk management.
+
+        Returns:
+            pd.DataFrame: The trade log as a DataFrame in exit order, with an 'Instrument' column.
+        """
+        if self.risk_type == 'constant':
+            self.constant_risk(constant_risk)
+        self.settle(self.merge_trades(self.resolve_trades(*params)))
+        return self.trade_log.to_df(Instrument=self.trade_instruments)
+
+
+# Example usage:
+# portfolio = Portfolio({'EUR_USD': eur_usd, 'GBP_USD': 'gbp_usd.csv',
+#                        'USD_JPY': {'instument_name': 'USD_JPY', 'time_frame': 'M5'}},
+#                       initial_capital=10000, risk_type='altering_8_step', max_open_risk=0.05)
+# trade_log_df = portfolio.run_strategy(20, 50)
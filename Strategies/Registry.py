@@ -0,0 +1,8 @@
+from Strategies.MACrossover import MACrossover
+from Strategies.PriceMACrossover import PriceMACrossover
+
+# Batch strategies by the name ParameterSweep, Portfolio and Robustness accept
+strategies = {
+    'MACrossover': MACrossover,
+    'PriceMACrossover': PriceMACrossover,
+}
@@ -0,0 +1,268 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from Strategies.Analytics import batch_metrics, trade_fields
+from Strategies.Registry import strategies
+from Strategies.Strategy import Strategy
+from utils.OHLC import OHLC
+
+# Float64 arrays of one path alive at once while `_simulate_chunk` runs a batch, at the peak of
+# block_bootstrap: the block rows, the three paths and the two temporaries of the last product,
+_bootstrap_arrays = 1 + 3 + 2
+# and of signal_rule: the three paths, both moving averages, the copy the second one is
+# computed from and the signals
+_signal_arrays = 3 + 2 + 1 + 1
+_arrays_per_path = max(_bootstrap_arrays, _signal_arrays)
+
+# Read-only market data of a worker process, set once by `_init_worker`
+_worker_data = {}
+
+
+def _init_worker(data, strategy, initial_capital, risk_type, constant_risk):
+    _worker_data['data'] = data
+    _worker_data['strategy'] = strategies[strategy]
+    _worker_data['initial_capital'] = initial_capital
+    _worker_data['risk_type'] = risk_type
+    _worker_data['constant_risk'] = constant_risk
+
+
+def block_starts(n, block_size, seed, paths):
+    """
+    Draw the first candle of every resampled block for the given path numbers.
+
+    Each path has its own random stream derived from (`seed`, path number), so a
+    path is the same whichever batch it is simulated in.
+
+    Returns:
+        np.ndarray: (len(paths), blocks per path) start positions into the n - 1 candle moves.
+    """
+    if n < 2:
+        raise ValueError("At least two candles are needed to resample their moves.")
+    if not 1 <= block_size <= n - 1:
+        raise ValueError(f"block_size must be between 1 and the {n - 1} candle moves, got {block_size}.")
+    n_blocks = -(-(n - 1) // block_size)
+    return np.array([np.random.default_rng([seed, path]).integers(0, n - block_size, n_blocks)
+                     for path in paths]).reshape(len(paths), n_blocks)
+
+
+def block_bootstrap(close, open_price, atr, starts, block_size):
+    """
+    Resample candles in blocks into synthetic price paths of the same length.
+
+    Each candle is described relative to the previous close: the log return of its
+    close, and the ratios of its open and ATR to the previous close. The blocks of
+    `block_size` consecutive candles starting at `starts` are chained from the first
+    close, which keeps the short-range dependence of returns and volatility.
+
+    Returns:
+        tuple: (close, open, atr) arrays of shape (len(starts), len(close)).
+    """
+    n = len(close)
+    n_paths = len(starts)
+    prev_close = close[:-1]
+    log_returns = np.log(close[1:] / prev_close)
+    open_ratio = open_price[1:] / prev_close
+    atr_ratio = atr[1:] / prev_close
+
+    rows = (starts[:, :, None] + np.arange(block_size)).reshape(n_paths, -1)[:, :n - 1]
+
+    paths_close = np.empty((n_paths, n))
+    paths_close[:, 0] = close[0]
+    paths_close[:, 1:] = close[0] * np.exp(np.cumsum(log_returns[rows], axis=1))
+    paths_open = np.empty((n_paths, n))
+    paths_open[:, 0] = open_price[0]
+    paths_open[:, 1:] = paths_close[:, :-1] * open_ratio[rows]
+    paths_atr = np.empty((n_paths, n))
+    paths_atr[:, 0] = atr[0]
+    paths_atr[:, 1:] = paths_close[:, :-1] * atr_ratio[rows]
+    return paths_close, paths_open, paths_atr
+
+
+def path_metrics(trade_logs, initial_capital):
+    """Return the `batch_metrics` of trade logs, as a list of dicts, with the lowest capital of each."""
+    metrics = batch_metrics(trade_logs, initial_capital)
+    metrics['Min Capital'] = [float(np.min(trade_fields(trade_log)['total_capital'], initial=initial_capital))
+                              for trade_log in trade_logs]
+    return metrics.to_dict('records')
+
+
+def _run_path(data, signals):
+    """Run the strategy core on one path with its precomputed signals and return its trade records."""
+    strategy = Strategy(data, _worker_data['initial_capital'], _worker_data['risk_type'],
+                        signal_rule=lambda close: signals)
+    strategy.run_strategy(constant_risk=_worker_data['constant_risk'])
+    return strategy.trade_log.records()
+
+
+def _simulate_chunk(task):
+    """Simulate one batch of bootstrapped paths."""
+    seed, paths, block_size, params = task
+    data = _worker_data['data']
+    close, open_price, atr = (data[col] for col in ('bid_c', 'bid_o', 'ATR'))
+    starts = block_starts(len(close), block_size, seed, paths)
+    paths_close, paths_open, paths_atr = block_bootstrap(close, open_price, atr, starts, block_size)
+
+    # One vectorized signal pass for the whole batch
+    signals = _worker_data['strategy'].signal_rule(paths_close, *params)
+    trade_logs = [
+        _run_path(OHLC(data.time, {'bid_c': paths_close[p], 'bid_o': paths_open[p], 'ATR': paths_atr[p]}, data.tz),
+                  signals[p])
+        for p in range(len(paths))
+    ]
+    return path_metrics(trade_logs, _worker_data['initial_capital'])
+
+
+def _walk_forward_split(task):
+    """Pick the best parameters on the train window and run them on the test window."""
+    train, test, grid = task
+    data = _worker_data['data']
+
+    def run(rows, params):
+        strategy = _worker_data['strategy'](data.take(rows), _worker_data['initial_capital'],
+                                            _worker_data['risk_type'])
+        strategy.run_strategy(*params, constant_risk=_worker_data['constant_risk'])
+        return path_metrics([strategy.trade_log.records()], _worker_data['initial_capital'])[0]
+
+    train_metrics = [run(train, params) for params in grid]
+    best = max(range(len(grid)), key=lambda k: train_metrics[k]['Final Capital'])
+    test_metrics = run(test, grid[best])
+    return {
+        'Train Start': data.time[train.start],
+        'Test Start': data.time[test.start],
+        'Test End': data.time[test.stop - 1],
+        'Params': grid[best],
+        'Train Final Capital': train_metrics[best]['Final Capital'],
+        **test_metrics,
+    }
+
+
+def distribution_stats(results, initial_capital, ruin_level=0.5, percentiles=(5, 25, 50, 75, 95)):
+    """
+    Summarize per-path results into distribution statistics.
+
+    Args:
+        results (pd.DataFrame): One row per path with 'Final Capital', 'Max Drawdown'
+            and 'Min Capital'.
+        initial_capital (float): Starting capital of every path.
+        ruin_level (float): A path is ruined once its capital falls to this fraction
+            of the initial capital.
+
+    Returns:
+        dict: Mean, standard deviation and percentiles of the final capital and of the
+        maximum drawdown, the probability of a loss and the probability of ruin.
+    """
+    stats = {'Paths': len(results)}
+    for column in ('Final Capital', 'Max Drawdown'):
+        values = results[column].to_numpy(dtype=np.float64)
+        stats[f'{column} Mean'] = float(values.mean())
+        stats[f'{column} Std'] = float(values.std())
+        for q, value in zip(percentiles, np.percentile(values, percentiles)):
+            stats[f'{column} P{q}'] = float(value)
+    stats['Loss Probability'] = float((results['Final Capital'] < initial_capital).mean())
+    stats['Ruin Probability'] = float((results['Min Capital'] <= ruin_level * initial_capital).mean())
+    return stats
+
+
+class Robustness:
+    def __init__(self, df, initial_capital, strategy='MACrossover', risk_type='altering_8_step',
+                 constant_risk=0.01, max_workers=None, memory_budget=512 * 2 ** 20):
+        """
+        Stress-test a strategy with bootstrapped price paths and walk-forward splits.
+
+        Paths are simulated in batches: each batch is generated and its signals computed
+        as 2-D arrays at once, and batches are spread over a process pool. The batch
+        size is chosen so that the batches in flight stay within `memory_budget`.
+
+        Args:
+            df (pd.DataFrame or OHLC): Market data with 'time', 'bid_o', 'bid_c' and an 'ATR*' column.
+            initial_capital (float): Starting capital of every path.
+            strategy (str): 'MACrossover' or 'PriceMACrossover'.
+            risk_type (str): The type of risk management ('constant' or 'altering_8_step').
+            constant_risk (float): Risk percentage for constant risk management.
+            max_workers (int): Number of worker processes; 1 runs in the current process.
+            memory_budget (int): Bytes the simulated paths may take at once.
+        """
+        if strategy not in strategies:
+            raise ValueError(f"Unsupported strategy: {strategy}")
+        atr_column = [col for col in df.columns if col.startswith("ATR")][0]
+        data = df if isinstance(df, OHLC) else OHLC.from_df(df, ['bid_o', 'bid_c', atr_column])
+        keep = data.valid(['bid_o', 'bid_c', atr_column])
+        columns = {'bid_o': data['bid_o'], 'bid_c': data['bid_c'], 'ATR': data[atr_column]}
+        self.data = OHLC(data.time, columns, data.tz).take(keep)
+        self.initial_capital = initial_capital
+        self.strategy = strategy
+        self.risk_type = risk_type
+        self.constant_risk = constant_risk
+        self.max_workers = max_workers or os.cpu_count()
+        self.memory_budget = memory_budget
+
+    def _map(self, function, tasks):
+        init_args = (self.data, self.strategy, self.initial_capital, self.risk_type, self.constant_risk)
+        if self.max_workers == 1:
+            _init_worker(*init_args)
+            return list(map(function, tasks))
+        with ProcessPoolExecutor(self.max_workers, initializer=_init_worker, initargs=init_args) as pool:
+            return list(pool.map(function, tasks))
+
+    def batch_size(self):
+        """Number of paths per batch that keeps every worker's batch within the memory budget."""
+        bytes_per_path = _arrays_per_path * 8 * len(self.data)
+        return max(1, self.memory_budget // (bytes_per_path * self.max_workers))
+
+    def monte_carlo(self, *params, n_paths=1000, block_size=50, seed=0, ruin_level=0.5):
+        """
+        Run the strategy on `n_paths` block-bootstrapped price paths.
+
+        Args:
+            *params: (MA_minor, MA_major) for MACrossover or (MA,) for PriceMACrossover.
+            n_paths (int): Number of simulated paths.
+            block_size (int): Candles per resampled block, 1 (a plain bootstrap) to `len(df) - 1`.
+            seed (int): Seed of the resampling; results don't depend on `max_workers`.
+            ruin_level (float): Fraction of the initial capital counted as ruin.
+
+        Returns:
+            tuple: (pd.DataFrame with one row of metrics per path, dict of `distribution_stats`).
+        """
+        block_starts(len(self.data), block_size, seed, [])  # Check the sizes before starting the workers
+        size = self.batch_size()
+        tasks = [(seed, range(start, min(start + size, n_paths)), block_size, params)
+                 for start in range(0, n_paths, size)]
+        results = pd.DataFrame([metrics for batch in self._map(_simulate_chunk, tasks) for metrics in batch])
+        return results, distribution_stats(results, self.initial_capital, ruin_level)
+
+    def walk_forward(self, grid, train_size, test_size, step=None):
+        """
+        Rolling walk-forward analysis.
+
+        On every split the configuration of `grid` with the best final capital on the
+        train window is run on the test window that follows it.
+
+        Args:
+            grid (iterable): Parameter tuples, e.g. [(10, 30), (20, 50)] or [(20,), (50,)].
+            train_size (int): Candles in each train window.
+            test_size (int): Candles in each test window.
+            step (int): Candles between two splits; defaults to `test_size`.
+
+        Returns:
+            pd.DataFrame: One row per split with the chosen parameters and the test metrics.
+        """
+        grid = [tuple(params) if isinstance(params, (list, tuple)) else (params,) for params in grid]
+        step = step or test_size
+        tasks = []
+        for start in range(0, len(self.data) - train_size - test_size + 1, step):
+            test_start = start + train_size
+            tasks.append((slice(start, test_start), slice(test_start, test_start + test_size), grid))
+        results = pd.DataFrame(self._map(_walk_forward_split, tasks))
+        if self.data.tz is not None and len(results):
+            for column in ('Train Start', 'Test Start', 'Test End'):
+                results[column] = pd.DatetimeIndex(results[column]).tz_localize('UTC').tz_convert(self.data.tz)
+        return results
+
+
+# Example usage:
+# robustness = Robustness(data, initial_capital=10000, risk_type='altering_8_step')
+# paths, stats = robustness.monte_carlo(20, 50, n_paths=5000, block_size=100)
+# splits = robustness.walk_forward([(10, 30), (20, 50), (50, 200)], train_size=20000, test_size=5000)
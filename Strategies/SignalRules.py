@@ -0,0 +1,40 @@
+import numpy as np
+
+
+def moving_average(close, window):
+    """
+    Rolling mean of `close`, NaN until the window is full (Series.rolling(window).mean()).
+
+    A 2-D `close` holds one price path per row; each row is averaged on its own.
+    """
+    import pandas as pd
+
+    if np.ndim(close) == 2:
+        return pd.DataFrame(close.T).rolling(window=window).mean().to_numpy().T
+    return pd.Series(close).rolling(window=window).mean().to_numpy()
+
+
+def crossover_signals(fast, slow):
+    """
+    Vectorized crossover of two series, or of two batches of series along the last axis.
+
+    Returns:
+        np.ndarray: 1 on the candle where `fast` crosses above `slow`, -1 where it
+        crosses below, 0 elsewhere. Comparisons with NaN never signal.
+    """
+    signals = np.zeros(np.shape(fast))
+    # Long signal: fast crosses above slow
+    signals[..., 1:][(fast[..., :-1] <= slow[..., :-1]) & (fast[..., 1:] > slow[..., 1:])] = 1
+    # Short signal: fast crosses below slow
+    signals[..., 1:][(fast[..., :-1] >= slow[..., :-1]) & (fast[..., 1:] < slow[..., 1:])] = -1
+    return signals
+
+
+def ma_crossover(close, MA_minor, MA_major):
+    """Signal when the `MA_minor` moving average crosses the `MA_major` one."""
+    return crossover_signals(moving_average(close, MA_minor), moving_average(close, MA_major))
+
+
+def price_ma_crossover(close, MA):
+    """Signal when the close crosses its `MA` moving average."""
+    return crossover_signals(close, moving_average(close, MA))
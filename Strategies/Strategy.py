@@ -0,0 +1,258 @@
+import numpy as np
+
+from Strategies.ExitResolver import ExitResolver, IntrabarFill
+from Strategies.TradeLog import TradeLog
+from utils.Instrumentation import instrumentation
+from utils.OHLC import OHLC
+
+
+class RiskManagement:
+    def __init__(self, initial_capital, risk_type='constant'):
+        """
+        Capital, position sizing and trade log shared by every backtest engine.
+
+        Args:
+            initial_capital (float): Starting capital for the strategy.
+            risk_type (str): The type of risk management ('constant' or 'altering_8_step').
+        """
+        self.risk_type = risk_type
+        self.initial_capital = initial_capital
+        self.current_capital = initial_capital
+        self.risk_percentage = 0.01  # Default risk percentage
+        self.risk_steps = [0.01, 0.02, 0.04, 0.08, 0.16, 0.32, 0.64, 1.0]  # Risk steps for altering risk
+        self.current_risk_step = 0  # Start at step 0
+        self.trade_log = TradeLog()  # To store trade results
+        self.total_pure_profit = 0
+        self.current_step_profit = 0
+
+    def constant_risk(self, risk_percentage=0.01):
+        """
+        Use a constant risk percentage for position sizing.
+
+        Args:
+            risk_percentage (float): Percentage of capital to risk per trade.
+        """
+        self.risk_percentage = risk_percentage
+
+    def alteringrisk(self):
+        """
+        Adjust risk dynamically based on profit or loss thresholds.
+        """
+        # Adjust risk step based on profit or loss thresholds
+        current_step_profit_per = (self.current_step_profit / self.initial_capital)
+        if current_step_profit_per >= 0.1:  # 10% profit
+            self.current_step_profit = 0
+            instrumentation.log('profit changed because of 0.1 profit ')
+            self.current_risk_step = min(self.current_risk_step + 1, len(self.risk_steps) - 1)
+        elif current_step_profit_per <= -0.05:  # 5% loss
+            self.current_step_profit = 0
+            self.current_risk_step = max(self.current_risk_step - 1, 0)
+            instrumentation.log('profit changed because of 0.05 lost ')
+
+        # Update risk percentage based on the current step
+        self.risk_percentage = self.risk_steps[self.current_risk_step]
+
+    def size_trade(self):
+        """Apply the risk management and return the amount risked per unit of price move."""
+        if self.risk_type == 'altering_8_step':
+            self.alteringrisk()  # Adjust risk dynamically
+        return self.risk_percentage * self.current_capital
+
+    def settle_trade(self, position_type, entry_price, exit_price, start_time, end_time):
+        """
+        Size a trade with the current capital and log its outcome.
+
+        Trades must be settled in the order they were opened. A trade that never
+        reached its stop-loss or take-profit (`exit_price` None) is not logged but
+        still advances the altering risk ladder.
+        """
+        risk_per_trade = self.size_trade()
+        if exit_price is None:
+            return
+        self.close_trade(position_type, entry_price, exit_price, risk_per_trade, start_time, end_time)
+
+    def close_trade(self, position_type, entry_price, exit_price, risk_per_trade, start_time, end_time):
+        """Book the profit or loss of a trade sized with `risk_per_trade`."""
+        if position_type == "long":
+            pip_amount = exit_price - entry_price
+        else:
+            pip_amount = entry_price - exit_price
+        profit_loss = pip_amount * risk_per_trade
+        self.total_pure_profit += profit_loss
+        self.current_step_profit += profit_loss
+        self.update_trade_log(start_time, end_time, entry_price, exit_price, pip_amount, profit_loss)
+
+    def update_trade_log(self, start_time, end_time, entry_price, exit_price, pip_amount, profit_loss):
+        """
+        Update trade log and adjust capital based on trade outcome.
+
+        Args:
+            start_time (str): Start time of the trade.
+            end_time (str): End time of the trade.
+            entry_price (float): Entry price of the position.
+            exit_price (float): Exit price of the position.
+            pip_amount (float): Difference between entry and exit price.
+            profit_loss (float): Profit or loss of the trade.
+        """
+        self.current_capital += profit_loss  # Update current capital
+
+        self.trade_log.append(start_time, end_time, entry_price, exit_price, pip_amount, profit_loss,
+                              self.current_capital, self.risk_percentage)
+
+
+def rule_key(rule):
+    """
+    Name identifying a signal rule across runs, '<module>.<qualified name>'.
+
+    Returns None for lambdas and functions defined inside another function: their
+    names don't identify them, so their signals are not cached.
+    """
+    name = getattr(rule, '__qualname__', None)
+    if name is None or '<lambda>' in name or '<locals>' in name:
+        return None
+    return f"{rule.__module__}.{name}"
+
+
+class Strategy(RiskManagement):
+    # Vectorized rule: signal_rule(close, *params) -> array of 1 (long), -1 (short) or 0
+    signal_rule = None
+    fill_models = ('close', 'intrabar')
+    intrabar_columns = ('bid_h', 'bid_l', 'ask_o', 'ask_h', 'ask_l')
+
+    def __init__(self, df, initial_capital, risk_type='constant', *, signal_rule=None, indicator_cache=None,
+                 fill_model='close', tie_break='stop_loss'):
+        """
+        Array-based backtest core: signals come from a pluggable vectorized rule,
+        positions open at the signal candle's open with a 3 ATR stop-loss and a
+        6 ATR take-profit taken from the previous candle.
+
+        With the 'close' fill model positions open at the bid open and exit at the
+        first bid close beyond a level. With 'intrabar' they open on the side they
+        trade (ask for longs, bid for shorts) and exit on the other side as soon as
+        a candle's high or low touches a level, see `IntrabarFill`.
+
+        Args:
+            df (pd.DataFrame or OHLC): Market data with 'time', 'bid_o', 'bid_c' and an
+                'ATR*' column. It is read through views and never modified.
+            initial_capital (float): Starting capital for the strategy.
+            risk_type (str): The type of risk management ('constant' or 'altering_8_step').
+            signal_rule (callable): Overrides the class `signal_rule`.
+            indicator_cache (IndicatorCache): Memoizes the signals of the same rule, closes and parameters,
+                see `rule_key`.
+            fill_model (str): 'close' or 'intrabar'; 'intrabar' also needs 'bid_h', 'bid_l',
+                'ask_o', 'ask_h' and 'ask_l'.
+            tie_break (str): Intrabar rule for candles touching both levels, see `IntrabarFill`.
+        """
+        if fill_model not in self.fill_models:
+            raise ValueError(f"Unsupported fill model: {fill_model}")
+        super().__init__(initial_capital, risk_type)
+        self.fill_model = fill_model
+        self.atr_column = [col for col in df.columns if col.startswith("ATR")][0]
+        if signal_rule is not None:
+            self.signal_rule = signal_rule
+        self.indicator_cache = indicator_cache
+
+        # Zero-copy views of the key columns; price strings are converted to numbers
+        columns = ['bid_c', 'bid_o', self.atr_column]
+        if fill_model == 'intrabar':
+            columns.extend(self.intrabar_columns)
+        data = df if isinstance(df, OHLC) else OHLC.from_df(df, columns)
+        prices = {col: np.asarray(data[col], dtype=np.float64) for col in columns}
+        self.times = data['time']
+        self.tz = data.tz
+        self.trade_log = TradeLog(tz=data.tz)
+
+        # Drop rows with NaN values in key columns
+        keep = ~np.isnan(sum(prices.values()))
+        if not keep.all():
+            prices = {col: values[keep] for col, values in prices.items()}
+            self.times = self.times[keep]
+        self.close, self.open, self.atr = prices['bid_c'], prices['bid_o'], prices[self.atr_column]
+
+        self.exit_resolver = ExitResolver(self.close)
+        if fill_model == 'intrabar':
+            self.ask_open = prices['ask_o']
+            self.bid_fill = IntrabarFill(self.open, prices['bid_l'], prices['bid_h'], tie_break)
+            self.ask_fill = IntrabarFill(self.ask_open, prices['ask_l'], prices['ask_h'], tie_break)
+        self.signals = np.zeros(len(self.close))
+
+    @instrumentation.timed('Strategy.calculate_signals')
+    def calculate_signals(self, *params):
+        """Generate buy (1) and sell (-1) signals on each candle with the signal rule."""
+        key = rule_key(self.signal_rule)
+        if self.indicator_cache is None or key is None:
+            self.signals = self.signal_rule(self.close, *params)
+        else:
+            self.signals = self.indicator_cache.cached(
+                key, params, [self.close], lambda: self.signal_rule(self.close, *params))
+        instrumentation.count('signals', int(np.count_nonzero(self.signals)))
+
+    @instrumentation.timed('Strategy.resolve_trades')
+    def resolve_trades(self):
+        """
+        Find the entry and exit of every position the signals open, without sizing them.
+
+        Returns:
+            dict: Arrays with one entry per position in opening order: 'entry' and 'exit'
+            candle positions (exit -1 when neither level is reached), 'long' (bool),
+            'entry_price', 'exit_price' (NaN without exit), 'stop_loss' and 'take_profit'.
+        """
+        entry = np.flatnonzero(self.signals[1:]) + 1
+        long = self.signals[entry] == 1
+        atr = self.atr[entry - 1]
+        if self.fill_model == 'intrabar':
+            open_price = np.where(long, self.ask_open[entry], self.open[entry])
+        else:
+            open_price = self.open[entry]
+        stop_loss = np.where(long, open_price - 3 * atr, open_price + 3 * atr)
+        take_profit = np.where(long, open_price + 6 * atr, open_price - 6 * atr)
+
+        if self.fill_model == 'intrabar':
+            # First touch from the entry candle on, on the side the position closes on
+            exit = np.full(len(entry), -1, dtype=np.int64)
+            exit_price = np.full(len(entry), np.nan)
+            for fill, side in ((self.bid_fill, long), (self.ask_fill, ~long)):
+                exit[side], exit_price[side] = fill.first_exits(entry[side], stop_loss[side], take_profit[side],
+                                                                long[side])
+        else:
+            # First candle after entry whose close hits the stop-loss or take-profit
+            lower = np.where(long, stop_loss, take_profit)
+            upper = np.where(long, take_profit, stop_loss)
+            exit = self.exit_resolver.first_exits(entry + 1, lower, upper)
+            exit_price = np.where(exit >= 0, self.close[np.maximum(exit, 0)], np.nan)
+        return {
+            'entry': entry, 'exit': exit, 'long': long, 'entry_price': open_price, 'exit_price': exit_price,
+            'stop_loss': stop_loss, 'take_profit': take_profit,
+        }
+
+    @instrumentation.timed('Strategy.handle_position')
+    def handle_position(self):
+        """
+        Execute trades based on signals at the signal candle's open price, with a
+        stop-loss of 3 and a take-profit of 6 times the previous candle's ATR.
+        """
+        trades = self.resolve_trades()
+        for i, j, long, entry_price, exit_price in zip(trades['entry'], trades['exit'], trades['long'],
+                                                       trades['entry_price'], trades['exit_price']):
+            position_type = "long" if long else "short"
+            if j < 0:
+                self.settle_trade(position_type, entry_price, None, self.times[i], None)
+            else:
+                self.settle_trade(position_type, entry_price, exit_price, self.times[i], self.times[j])
+
+    def run_strategy(self, *params, constant_risk=0.01):
+        """
+        Execute the complete strategy and return the trade log.
+
+        Args:
+            *params: Parameters of the signal rule.
+            constant_risk (float): Risk percentage for constant risk management.
+
+        Returns:
+            pd.DataFrame: The trade log as a DataFrame.
+        """
+        if self.risk_type == 'constant':
+            self.constant_risk(constant_risk)
+        self.calculate_signals(*params)
+        self.handle_position()
+        return self.trade_log.to_df()
@@ -0,0 +1,162 @@
+import math
+from collections import deque
+
+from Indicators.ATR import ATR, has_missing
+from Indicators.MA import RollingWindowMean
+from Strategies.Strategy import RiskManagement
+
+
+def candles_from_df(df):
+    """Yield the rows of a DataFrame as candle dicts, building one dict at a time."""
+    columns = list(df.columns)
+    for row in df.itertuples(index=False, name=None):
+        yield dict(zip(columns, row))
+
+
+def candles_from_csv(path, chunksize=100_000):
+    """Yield the rows of a candle CSV as dicts, reading `chunksize` rows at a time."""
+    import pandas as pd
+
+    for chunk in pd.read_csv(path, chunksize=chunksize, float_precision='round_trip'):
+        yield from candles_from_df(chunk)
+
+
+class StreamingBacktest(RiskManagement):
+    strategies = ('MACrossover', 'PriceMACrossover')
+
+    def __init__(self, initial_capital, risk_type='constant', strategy='MACrossover', atr_column=None,
+                 ATR_period=None, max_pending=1_000_000):
+        """
+        Run MACrossover or PriceMACrossover over a stream of candles in constant memory.
+
+        Only the moving average windows, the previous candle and the unsettled positions
+        are kept. Positions are settled in the order they were opened, which is the
+        order `Strategy.execute_trade` sizes them in, so the trade log is identical to the
+        batch strategy on the same candles. This makes the memory bounded by the number
+        of unsettled positions rather than by the stream: a position that takes long to
+        reach its stop-loss or take-profit holds back every position opened after it,
+        so their number is capped by `max_pending`.
+
+        Args:
+            initial_capital (float): Starting capital for the strategy.
+            risk_type (str): The type of risk management ('constant' or 'altering_8_step').
+            strategy (str): 'MACrossover' or 'PriceMACrossover'.
+            atr_column (str): Candle key holding a precomputed ATR, e.g. 'ATR15'.
+                Defaults to the first key starting with "ATR".
+            ATR_period (int): Compute the ATR on the fly from the ask prices instead.
+            max_pending (int): Most positions kept waiting to be settled; opening one more
+                raises RuntimeError. None leaves it unbounded.
+        """
+        if strategy not in self.strategies:
+            raise ValueError(f"Unsupported strategy: {strategy}")
+        super().__init__(initial_capital, risk_type)
+        self.strategy = strategy
+        self.atr_column = atr_column
+        self.atr = ATR(ATR_period) if ATR_period else None
+        self.max_pending = max_pending
+
+        self.positions = deque()  # Every position not settled yet, in opening order
+        self.open_positions = []  # Positions whose exit has not been reached yet
+
+    def open_position(self, position_type, entry_price, atr, time):
+        """Open a position at `entry_price` with a 3 ATR stop-loss and a 6 ATR take-profit."""
+        if position_type == "long":
+            stop_loss = entry_price - 3 * atr
+            take_profit = entry_price + 6 * atr
+            lower, upper = stop_loss, take_profit
+        else:
+            stop_loss = entry_price + 3 * atr
+            take_profit = entry_price - 6 * atr
+            lower, upper = take_profit, stop_loss
+        if self.max_pending is not None and len(self.positions) >= self.max_pending:
+            raise RuntimeError(f"{len(self.positions)} positions are waiting for the one opened at "
+                               f"{self.positions[0]['start_time']} to exit; raise max_pending to keep going.")
+        position = {
+            "type": position_type, "entry_price": entry_price, "lower": lower, "upper": upper,
+            "start_time": time, "exit_price": None, "end_time": None,
+        }
+        self.positions.append(position)
+        self.open_positions.append(position)
+
+    def check_exits(self, price, time):
+        """Close every open position whose stop-loss or take-profit is hit by the close `price`."""
+        still_open = []
+        for position in self.open_positions:
+            if price <= position["lower"] or price >= position["upper"]:
+                position["exit_price"] = price
+                position["end_time"] = time
+            else:
+                still_open.append(position)
+        self.open_positions = still_open
+
+    def settle(self, final=False):
+        """
+        Size and log closed positions in opening order, as `Strategy.execute_trade` does.
+
+        A position can only be settled once every earlier one is, because its size
+        depends on the capital after them. With `final`, positions that never closed
+        are dropped after the same risk update `settle_trade` makes for them.
+        """
+        while self.positions and (final or self.positions[0]["exit_price"] is not None):
+            position = self.positions.popleft()
+            self.settle_trade(position["type"], position["entry_price"], position["exit_price"],
+                              position["start_time"], position["end_time"])
+
+    def crossover(self, prev, current):
+        """Return 1, -1 or 0 for a long, short or no crossover between two (fast, slow) pairs."""
+        if prev[0] <= prev[1] and current[0] > current[1]:
+            return 1
+        if prev[0] >= prev[1] and current[0] < current[1]:
+            return -1
+        return 0
+
+    def run_strategy(self, candles, *MA_args, constant_risk=0.01):
+        """
+        Consume `candles` and return the trade log.
+
+        Args:
+            candles (iterable of Mapping): Candles with 'time', 'bid_o', 'bid_c' and either the
+                ATR column or, with `ATR_period`, 'ask_h', 'ask_l' and 'ask_c'.
+            *MA_args: (MA_minor, MA_major) for MACrossover or (MA,) for PriceMACrossover.
+            constant_risk (float): Risk percentage for constant risk management.
+
+        Returns:
+            pd.DataFrame: The trade log as a DataFrame.
+        """
+        if self.risk_type == 'constant':
+            self.constant_risk(constant_risk)
+        averages = [RollingWindowMean(window) for window in MA_args]
+
+        prev = None
+        for candle in candles:
+            open_price, close = float(candle['bid_o']), float(candle['bid_c'])
+            # Drop rows with NaN values in key columns
+            if math.isnan(open_price + close):
+                continue
+            if self.atr is not None:
+                # calculate_ATR drops the rows with any missing value before the strategy runs
+                if has_missing(candle):
+                    continue
+                atr = self.atr.update(candle)
+            else:
+                if self.atr_column is None:
+                    self.atr_column = [key for key in candle if key.startswith("ATR")][0]
+                atr = float(candle[self.atr_column])
+                if math.isnan(atr):
+                    continue
+
+            means = [average.update(close) for average in averages]
+            current = means if self.strategy == 'MACrossover' else [close, means[0]]
+
+            # Positions opened on an earlier candle exit on this candle's close
+            self.check_exits(close, candle['time'])
+            if prev is not None:
+                signal = self.crossover(prev["pair"], current)
+                if signal:
+                    # Enter at this candle's open with the previous candle's ATR
+                    self.open_position("long" if signal == 1 else "short", open_price, prev["atr"], candle['time'])
+            self.settle()
+            prev = {"pair": current, "atr": atr}
+
+        self.settle(final=True)
+        return self.trade_log.to_df()
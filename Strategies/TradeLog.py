@@ -0,0 +1,87 @@
+import sys
+
+import numpy as np
+
+# Trade log fields and the columns of the trade log DataFrame they become
+columns = {
+    'start_time': 'Start Time',
+    'end_time': 'End Time',
+    'entry_price': 'Entry Price',
+    'exit_price': 'Exit Price',
+    'pip_amount': 'Pip Amount',
+    'profit_loss': 'Profit/Loss',
+    'total_capital': 'Total Capital',
+    'risk_percentage': 'Risk Percentage',
+}
+
+
+def trade_dtype(time_dtype='datetime64[ns]'):
+    """Structured dtype of one trade: two times of `time_dtype` and six float64 fields."""
+    fields = [(name, time_dtype) for name in ('start_time', 'end_time')]
+    fields += [(name, np.float64) for name in columns if name not in ('start_time', 'end_time')]
+    return np.dtype(fields)
+
+
+class TradeLog:
+    def __init__(self, time_dtype=None, capacity=64, tz=None):
+        """
+        Append-only trade log stored as one structured array, 64 bytes per trade with datetime64 times.
+
+        The array doubles when full, so appending is amortized O(1).
+
+        Args:
+            time_dtype (np.dtype): Dtype of the trade times; defaults to datetime64 when the
+                first logged time is a datetime64 or a pd.Timestamp (kept in UTC, its time
+                zone restored by `to_df`), object otherwise (e.g. strings).
+            capacity (int): Trades allocated at the first append.
+            tz: Time zone `to_df` gives to datetime64 times logged in UTC, e.g. `OHLC.tz`.
+        """
+        self.time_dtype = time_dtype
+        self.tz = tz
+        self.timestamps = False
+        self.capacity = capacity
+        self.buffer = None
+        self.size = 0
+
+    def append(self, start_time, end_time, entry_price, exit_price, pip_amount, profit_loss, total_capital,
+               risk_percentage):
+        """Log one trade."""
+        if self.buffer is None:
+            if self.time_dtype is None and isinstance(start_time, np.datetime64):
+                self.time_dtype = start_time.dtype
+            elif self.time_dtype is None:
+                # Only checked once; times can't be Timestamps without pandas loaded
+                pd = sys.modules.get('pandas')
+                self.timestamps = pd is not None and isinstance(start_time, pd.Timestamp)
+                if self.timestamps:
+                    self.time_dtype, self.tz = f'datetime64[{start_time.unit}]', start_time.tz
+                else:
+                    self.time_dtype = object
+            self.buffer = np.empty(self.capacity, dtype=trade_dtype(self.time_dtype))
+        elif self.size == len(self.buffer):
+            self.buffer = np.concatenate((self.buffer, np.empty_like(self.buffer)))
+        if self.timestamps:
+            start_time, end_time = start_time.to_datetime64(), end_time.to_datetime64()
+        self.buffer[self.size] = (start_time, end_time, entry_price, exit_price, pip_amount, profit_loss,
+                                  total_capital, risk_percentage)
+        self.size += 1
+
+    def __len__(self):
+        return self.size
+
+    def records(self):
+        """Return the logged trades as a structured array (a view, not a copy)."""
+        if self.buffer is None:
+            return np.empty(0, dtype=trade_dtype(self.time_dtype or 'datetime64[ns]'))
+        return self.buffer[:self.size]
+
+    def to_df(self, **extra_columns):
+        """Return the trade log DataFrame, with `extra_columns` (one value per trade) appended."""
+        import pandas as pd
+
+        records = self.records()
+        df = {column: records[name] for name, column in columns.items()}
+        if self.tz is not None:
+            for name in ('start_time', 'end_time'):
+                df[columns[name]] = pd.DatetimeIndex(records[name]).tz_localize('UTC').tz_convert(self.tz)
+        return pd.DataFrame({**df, **extra_columns})
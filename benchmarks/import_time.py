@@ -0,0 +1,105 @@
+"""
+Check the cold import time of the core modules against a budget.
+
+Run from the repository root:
+
+    python -m benchmarks.import_time
+    python -m benchmarks.import_time --repeat 10 --output imports.json
+
+Every module is imported in a fresh interpreter, `--repeat` times, and its best time
+is compared with its budget. The modules live workers and process-pool workers start
+with must also not load pandas or the network code (requests, utils.args) at import
+time. The exit status is 1 when a module is over budget or loads a forbidden module.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+from datetime import datetime, timezone
+
+root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Modules checked for being loaded as a side effect of an import
+heavy_modules = ('numpy', 'pandas', 'requests', 'utils.args')
+
+# module -> (budget in milliseconds, modules it must not load)
+budgets = {
+    'utils.Instrumentation': (20, ('numpy', 'pandas')),
+    'utils.OHLC': (150, ('pandas',)),
+    'Indicators.MA': (150, ('pandas',)),
+    'Indicators.ATR': (150, ('pandas',)),
+    'Indicators.TPO': (150, ('pandas',)),
+    'Strategies.ExitResolver': (150, ('pandas',)),
+    'Strategies.Strategy': (150, ('pandas',)),
+    'Strategies.MACrossover': (150, ('pandas',)),
+    'Strategies.PriceMACrossover': (150, ('pandas',)),
+    'Strategies.StreamingBacktest': (150, ('pandas',)),
+    'utils.DataGeneration': (150, ('pandas', 'requests', 'utils.args')),
+}
+
+_probe = (
+    "import json, sys, time\n"
+    "start = time.perf_counter()\n"
+    "import {module}\n"
+    "seconds = time.perf_counter() - start\n"
+    "print(json.dumps({{'seconds': seconds, 'loaded': [m for m in {heavy!r} if m in sys.modules]}}))\n"
+)
+
+
+def import_time(module, repeat=5):
+    """Return the best import time of `module` over `repeat` fresh interpreters and the heavy modules it loads."""
+    best = None
+    for _ in range(repeat):
+        output = subprocess.run([sys.executable, '-c', _probe.format(module=module, heavy=heavy_modules)],
+                                cwd=root, capture_output=True, text=True, check=True).stdout
+        result = json.loads(output.splitlines()[-1])
+        if best is None or result['seconds'] < best['seconds']:
+            best = result
+    return best
+
+
+def check_budgets(modules, repeat=5):
+    """Measure the selected modules and return the report and the list of budget violations."""
+    results, violations = [], []
+    for module in modules:
+        budget_ms, forbidden = budgets[module]
+        result = import_time(module, repeat)
+        milliseconds = result['seconds'] * 1e3
+        loaded = [name for name in forbidden if name in result['loaded']]
+        if milliseconds > budget_ms:
+            violations.append(f"{module} took {milliseconds:.1f} ms, budget {budget_ms} ms")
+        if loaded:
+            violations.append(f"{module} loads {', '.join(loaded)}")
+        results.append({'module': module, 'seconds': result['seconds'], 'budget_seconds': budget_ms / 1e3,
+                        'loaded': result['loaded']})
+        print(f"{module:<32} {milliseconds:>8.1f} ms {budget_ms:>6} ms budget  "
+              f"loads {', '.join(result['loaded']) or '-'}")
+    report = {
+        'created': datetime.now(timezone.utc).isoformat(),
+        'python': sys.version.split()[0],
+        'repeat': repeat,
+        'results': results,
+    }
+    return report, violations
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--only', nargs='+', choices=list(budgets), default=list(budgets))
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--output', help="Write the JSON report to this file.")
+    args = parser.parse_args(argv)
+
+    report, violations = check_budgets(args.only, args.repeat)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+
+    for violation in violations:
+        print(violation)
+    return 1 if violations else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
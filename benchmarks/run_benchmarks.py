@@ -0,0 +1,168 @@
+"""
+Benchmark the indicator, strategy and data ingest hot paths on synthetic candles.
+
+Run from the repository root:
+
+    python -m benchmarks.run_benchmarks --output bench.json
+    python -m benchmarks.run_benchmarks --compare bench.json --threshold 0.2
+
+Every benchmark reports its best wall time over `--repeat` runs, the throughput in
+candles per second and the peak memory traced during one extra run. With `--compare`
+the results are checked against an earlier report and the exit status is 1 when a
+benchmark got slower than the threshold allows.
+"""
+import argparse
+import json
+import platform
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+
+from Indicators.ATR import ATR
+from Indicators.MA import MA
+from Indicators.TPO import TPO
+from Strategies.MACrossover import MACrossover
+from Strategies.PriceMACrossover import PriceMACrossover
+from benchmarks.stub_server import StubCandleServer
+from benchmarks.synthetic import synthetic_candles
+
+# Base URL of the stub candle server while the benchmarks run
+stub_url = None
+
+
+def with_atr(df):
+    ATR().calculate_ATR(15, df)
+    return df
+
+
+def ingest_setup(df):
+    """Point a DataGeneration at the stub server for the time span of `df`."""
+    from utils.DataGeneration import DataGeneration
+
+    start = df['time'].iloc[0]
+    end = df['time'].iloc[-1] + pd.Timedelta(minutes=5)
+    data_generation = DataGeneration('EUR_USD', 'M5', start_time=start.strftime('%Y-%m-%dT%H:%M:%SZ'),
+                                     end_time=end.strftime('%Y-%m-%dT%H:%M:%SZ'), max_workers=4,
+                                     service_url=stub_url)
+    return data_generation
+
+
+# name -> (setup(df) returning the argument of run, run(argument))
+benchmarks = {
+    'MA.calculate_MA': (lambda df: df.copy(), lambda df: MA().calculate_MA(20, df)),
+    'ATR.calculate_ATR': (lambda df: df.copy(), lambda df: ATR().calculate_ATR(15, df)),
+    'TPO.calculate_TPO': (lambda df: df, lambda df: TPO().calculate_TPO(df, 20, step=0.0001)),
+    'MACrossover.run_strategy': (
+        with_atr, lambda df: MACrossover(df, 10000).run_strategy(20, 50)),
+    'PriceMACrossover.run_strategy': (
+        with_atr, lambda df: PriceMACrossover(df, 10000).run_strategy(20)),
+    'DataGeneration.get_instruments_df': (
+        ingest_setup, lambda data_generation: data_generation.get_instruments_df()),
+}
+
+
+def measure(setup, run, df, repeat):
+    """Return the best wall time over `repeat` runs and the peak traced memory of one more run."""
+    seconds = []
+    for _ in range(repeat):
+        argument = setup(df)
+        start = time.perf_counter()
+        run(argument)
+        seconds.append(time.perf_counter() - start)
+
+    argument = setup(df)
+    tracemalloc.start()
+    try:
+        run(argument)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return min(seconds), peak
+
+
+def run_benchmarks(sizes, names, repeat=3, seed=0):
+    """Run the selected benchmarks on synthetic candles of every size and return the report."""
+    results = []
+    for size in sizes:
+        candles = synthetic_candles(size, seed)
+        for name in names:
+            setup, run = benchmarks[name]
+            seconds, peak = measure(setup, run, candles, repeat)
+            results.append({
+                'name': name,
+                'size': size,
+                'seconds': seconds,
+                'candles_per_second': size / seconds,
+                'peak_bytes': peak,
+            })
+            print(f"{name:<36} {size:>9} {seconds:>10.4f}s {size / seconds:>14,.0f} candles/s "
+                  f"{peak / 2 ** 20:>9.1f} MiB")
+    return {
+        'created': datetime.now(timezone.utc).isoformat(),
+        'python': sys.version.split()[0],
+        'numpy': np.__version__,
+        'pandas': pd.__version__,
+        'platform': platform.platform(),
+        'repeat': repeat,
+        'results': results,
+    }
+
+
+def compare(report, baseline, threshold):
+    """
+    Compare two reports benchmark by benchmark.
+
+    Returns:
+        list: (name, size, baseline seconds, seconds, relative change) of every benchmark
+        slower than `baseline` by more than `threshold`.
+    """
+    previous = {(result['name'], result['size']): result for result in baseline['results']}
+    regressions = []
+    for result in report['results']:
+        before = previous.get((result['name'], result['size']))
+        if before is None:
+            continue
+        change = result['seconds'] / before['seconds'] - 1
+        print(f"{result['name']:<36} {result['size']:>9} {before['seconds']:>10.4f}s -> "
+              f"{result['seconds']:>10.4f}s {change:>+8.1%}")
+        if change > threshold:
+            regressions.append((result['name'], result['size'], before['seconds'], result['seconds'], change))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10_000, 100_000, 1_000_000])
+    parser.add_argument('--only', nargs='+', choices=list(benchmarks), default=list(benchmarks))
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help="Write the JSON report to this file.")
+    parser.add_argument('--compare', help="Earlier JSON report to check for regressions.")
+    parser.add_argument('--threshold', type=float, default=0.2,
+                        help="Slowdown, as a fraction of the baseline time, counted as a regression.")
+    args = parser.parse_args(argv)
+
+    global stub_url
+    with StubCandleServer() as server:
+        stub_url = server.url
+        report = run_benchmarks(args.sizes, args.only, args.repeat, args.seed)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(report, json.load(f), args.threshold)
+        if regressions:
+            print(f"{len(regressions)} benchmark(s) slower than the baseline by more than {args.threshold:.0%}")
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
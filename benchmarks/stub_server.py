@@ -0,0 +1,74 @@
+import json
+import threading
+from collections import deque
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from benchmarks.synthetic import api_candles
+from utils.TimeFrames import time_frame_to_seconds
+
+
+def _to_seconds(timestamp):
+    return int(datetime.fromisoformat(timestamp.replace('Z', '+00:00')).timestamp())
+
+
+class _CandleHandler(BaseHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        with self.server.lock:
+            self.server.requests += 1
+            failure = self.server.failures.popleft() if self.server.failures else None
+        if failure is not None:
+            status, headers = failure
+            self.send_response(status)
+            for name, value in headers.items():
+                self.send_header(name, value)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+
+        query = {key: values[0] for key, values in parse_qs(urlparse(self.path).query).items()}
+        data = api_candles(_to_seconds(query['from']), _to_seconds(query['to']),
+                           time_frame_to_seconds[query['granularity']], query.get('price', 'MBA'))
+        body = json.dumps(data).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class StubCandleServer:
+    def __init__(self, failures=()):
+        """
+        Local HTTP server answering `/instruments/<name>/candles?from=&to=&granularity=&price=`
+        with synthetic candles, for benchmarking and testing downloads without the network.
+
+        Use as a context manager; `url` is the base URL to request instruments from and
+        `requests` counts the requests served.
+
+        Args:
+            failures (iterable): (status code, headers) answered, in order, to the first
+                requests instead of candles, e.g. (429, {'Retry-After': '1'}).
+        """
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), _CandleHandler)
+        self.server.failures = deque(failures)
+        self.server.requests = 0
+        self.server.lock = threading.Lock()
+        self.url = f'http://127.0.0.1:{self.server.server_port}'
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    @property
+    def requests(self):
+        return self.server.requests
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.server.shutdown()
+        self.server.server_close()
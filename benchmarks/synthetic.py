@@ -0,0 +1,69 @@
+import numpy as np
+import pandas as pd
+
+price_types = (('M', 'mid'), ('B', 'bid'), ('A', 'ask'))
+
+
+def random_walk(n, seed=0, start_price=1.1, volatility=0.0005, spread=0.00012):
+    """
+    Generate `n` OHLC candles of a Gaussian random walk, rounded to 5 decimals like FX quotes.
+
+    Returns:
+        dict: 'volume' (int64) and, for 'mid', 'bid' and 'ask', an (n, 4) float64 o/h/l/c block.
+    """
+    rng = np.random.default_rng(seed)
+    close = start_price + np.cumsum(rng.normal(0, volatility, n))
+    open_ = np.r_[start_price, close[:-1]] + rng.normal(0, volatility / 5, n)
+    high = np.maximum(open_, close) + np.abs(rng.normal(0, volatility / 2, n))
+    low = np.minimum(open_, close) - np.abs(rng.normal(0, volatility / 2, n))
+    ohlc = np.column_stack((open_, high, low, close))
+    return {
+        'volume': rng.integers(1, 500, n),
+        'mid': np.round(ohlc, 5),
+        'bid': np.round(ohlc - spread / 2, 5),
+        'ask': np.round(ohlc + spread / 2, 5),
+    }
+
+
+def synthetic_candles(n, seed=0, time_frame_seconds=300, start='2020-01-01'):
+    """
+    Generate `n` candles shaped like `DataGeneration.get_instruments_df` output.
+
+    Columns are 'time' (datetime64[ns, UTC]), 'volume' and the float64 mid, bid and
+    ask o/h/l/c columns.
+    """
+    walk = random_walk(n, seed)
+    df = pd.DataFrame({
+        'time': pd.date_range(start, periods=n, freq=pd.Timedelta(seconds=time_frame_seconds), tz='UTC'),
+        'volume': walk['volume'],
+    })
+    for _, price in price_types:
+        for k, column in enumerate('ohlc'):
+            df[f'{price}_{column}'] = walk[price][:, k]
+    return df
+
+
+def api_candles(start_seconds, end_seconds, time_frame_seconds, price='MBA'):
+    """
+    Build a candles endpoint response for [start_seconds, end_seconds).
+
+    Candles are a deterministic function of their timestamp, so overlapping requests
+    agree and any window can be served without keeping state.
+    """
+    first = -(-start_seconds // time_frame_seconds) * time_frame_seconds
+    stamps = np.arange(first, end_seconds, time_frame_seconds, dtype=np.int64)
+    base = 1.1 + 0.01 * np.sin(stamps / 20000) + (stamps * 7919 % 97) / 1e5
+    ohlc = {'o': base, 'h': base + 0.0003, 'l': base - 0.0002, 'c': base + 0.0001}
+    times = np.datetime_as_string(stamps.astype('datetime64[s]'), unit='s')
+
+    formatted = {
+        name: {key: [f'{value:.5f}' for value in values.tolist()] for key, values in ohlc.items()}
+        for code, name in price_types if code in price
+    }
+    candles = []
+    for k, (stamp, time) in enumerate(zip(stamps.tolist(), times.tolist())):
+        candle = {'complete': True, 'volume': stamp % 50, 'time': f'{time}.000000000Z'}
+        for name, values in formatted.items():
+            candle[name] = {key: values[key][k] for key in 'ohlc'}
+        candles.append(candle)
+    return {'candles': candles}
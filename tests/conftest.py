@@ -0,0 +1,29 @@
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+# The packages are top-level directories of the repository, imported without installation
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def candles(n=3000, seed=0, scale=1.0):
+    """Random-walk M5 candles with bid, ask and mid prices, times as API strings."""
+    rng = np.random.default_rng(seed)
+    close = 1.1 + np.cumsum(rng.normal(0, 0.0005, n))
+    open = np.r_[close[0], close[:-1]] + rng.normal(0, 0.0001, n)
+    high = np.maximum(open, close) + np.abs(rng.normal(0, 0.0003, n))
+    low = np.minimum(open, close) - np.abs(rng.normal(0, 0.0003, n))
+    time = pd.date_range('2024-01-01', periods=n, freq='5min', tz='UTC')
+    df = pd.DataFrame({'time': time.strftime('%Y-%m-%dT%H:%M:%S.000000000Z'), 'volume': rng.integers(1, 500, n)})
+    for price, shift in (('mid', 0), ('bid', -0.00006), ('ask', 0.00006)):
+        for kind, values in zip('ohlc', (open, high, low, close)):
+            df[f'{price}_{kind}'] = np.round((values + shift) * scale, 5)
+    return df
+
+
+@pytest.fixture(scope='session')
+def make_candles():
+    return candles
@@ -0,0 +1,53 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from Strategies.Analytics import batch_metrics, trade_metrics
+from utils.TimeFrames import time_ns
+
+
+def trade_log(start, end, profit, initial_capital=10000):
+    return pd.DataFrame({
+        'Start Time': pd.to_datetime(start, utc=True),
+        'End Time': pd.to_datetime(end, utc=True),
+        'Entry Price': 1.0,
+        'Exit Price': 1.0,
+        'Pip Amount': 0.0,
+        'Profit/Loss': profit,
+        'Total Capital': initial_capital + np.cumsum(profit),
+        'Risk Percentage': 0.01,
+    })
+
+
+def test_time_ns_agrees_for_every_time_form():
+    times = pd.date_range('2024-01-01', periods=5, freq='5min', tz='UTC')
+    expected = times.as_unit('ns').asi8
+    assert np.array_equal(time_ns(times.tz_localize(None).to_numpy()), expected)
+    assert np.array_equal(time_ns(times.tz_localize(None).to_numpy().astype('datetime64[s]')), expected)
+    assert np.array_equal(time_ns(pd.Series(times.tz_convert('America/New_York'))), expected)
+    assert np.array_equal(time_ns(times.strftime('%Y-%m-%dT%H:%M:%SZ')), expected)
+
+
+def test_single_trade_has_no_ratios():
+    metrics = trade_metrics(trade_log(['2024-01-01'], ['2024-01-01'], [100.0]), 10000)
+    assert metrics['Trades'] == 1
+    assert np.isnan(metrics['Sharpe Ratio']) and np.isnan(metrics['Sortino Ratio'])
+
+
+def test_equal_returns_have_no_ratios():
+    # Every trade returns exactly 1% of the capital before it
+    capital = 10000 * 1.01 ** np.arange(4)
+    log = trade_log(pd.date_range('2024-01-01', periods=4, freq='D'),
+                    pd.date_range('2024-01-01 12:00', periods=4, freq='D'), capital * 0.01)
+    metrics = trade_metrics(log, 10000)
+    assert np.isnan(metrics['Sharpe Ratio']) and np.isnan(metrics['Sortino Ratio'])
+
+
+def test_ratios_are_finite_with_dispersion():
+    log = trade_log(pd.date_range('2024-01-01', periods=4, freq='D'),
+                    pd.date_range('2024-01-01 12:00', periods=4, freq='D'), [100.0, -50.0, 80.0, -20.0])
+    metrics = batch_metrics({'run': log, 'empty': log.iloc[:0]}, 10000)
+    assert np.isfinite(metrics.loc['run', ['Sharpe Ratio', 'Sortino Ratio']]).all()
+    assert metrics.loc['empty', 'Trades'] == 0
+    assert np.isnan(metrics.loc['empty', 'Sharpe Ratio'])
+    assert metrics.loc['run', 'Final Capital'] == pytest.approx(10110.0)
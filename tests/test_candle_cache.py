@@ -0,0 +1,66 @@
+import os
+import time
+
+import pandas as pd
+import pytest
+
+from benchmarks.stub_server import StubCandleServer
+from utils.CandleCache import CandleCache
+from utils.DataGeneration import DataGeneration
+
+
+def data_generation(url, start='2024-01-01T00:00:00Z', end='2024-01-01T10:00:00Z'):
+    return DataGeneration('EUR_USD', 'M5', start_time=start, end_time=end, service_url=url,
+                          MaxReturnedCandleLimit=25, backoff=0)
+
+
+@pytest.fixture
+def server():
+    with StubCandleServer() as server:
+        yield server
+
+
+def test_second_read_is_served_from_disk(tmp_path, server):
+    cache = CandleCache(tmp_path)
+    expected = data_generation(server.url).get_instruments_df()
+    fetched = server.requests
+
+    first = cache.get_instruments_df(data_generation(server.url))
+    assert server.requests == 2 * fetched
+    second = cache.get_instruments_df(data_generation(server.url))
+    assert server.requests == 2 * fetched
+    pd.testing.assert_frame_equal(first, second)
+    pd.testing.assert_frame_equal(first[expected.columns], expected, check_dtype=False)
+
+
+def test_only_the_missing_range_is_fetched(tmp_path, server):
+    cache = CandleCache(tmp_path)
+    cache.get_instruments_df(data_generation(server.url, end='2024-01-01T05:00:00Z'))  # 60 candles
+    before = server.requests
+    df = cache.get_instruments_df(data_generation(server.url))  # 60 more
+    assert server.requests - before == 3
+    assert len(df) == 120 and df['time'].is_monotonic_increasing and df['time'].is_unique
+    assert cache.info()['covered'][0] == [(pd.Timestamp('2024-01-01T00:00:00Z'), pd.Timestamp('2024-01-01T10:00:00Z'))]
+
+
+def test_iter_candles_streams_the_cached_rows(tmp_path, server):
+    cache = CandleCache(tmp_path)
+    df = cache.get_instruments_df(data_generation(server.url))
+    candles = list(cache.iter_candles(data_generation(server.url), chunksize=7))
+    assert pd.DataFrame(candles).equals(df)
+
+
+def test_evict_by_size_and_age(tmp_path, server):
+    cache = CandleCache(tmp_path)
+    cache.get_instruments_df(data_generation(server.url))
+    cache.get_instruments_df(DataGeneration('GBP_USD', 'M5', start_time='2024-01-01T00:00:00Z',
+                                            end_time='2024-01-01T10:00:00Z', service_url=server.url))
+    info = cache.info()
+    assert list(info['key']) == ['EUR_USD_M5_MBA', 'GBP_USD_M5_MBA'] and (info['rows'] == 120).all()
+
+    # The least recently used series goes first
+    assert cache.evict(max_bytes=info['bytes'].max()) == ['EUR_USD_M5_MBA']
+    assert cache.evict(max_age=3600) == []
+    time.sleep(0.05)
+    assert cache.evict(max_age=0.01) == ['GBP_USD_M5_MBA']
+    assert os.listdir(tmp_path) == []
@@ -0,0 +1,79 @@
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+
+import numpy as np
+import pytest
+
+from benchmarks.stub_server import StubCandleServer
+from utils.DataGeneration import DataGeneration, retry_delay
+
+START, END = '2024-01-01T00:00:00Z', '2024-01-01T10:00:00Z'  # 120 M5 candles
+
+
+def data_generation(url, **kwargs):
+    kwargs = {'MaxReturnedCandleLimit': 25, 'backoff': 0, **kwargs}
+    return DataGeneration('EUR_USD', 'M5', start_time=START, end_time=END, service_url=url, **kwargs)
+
+
+def test_retry_delay_reads_seconds_and_http_dates():
+    assert retry_delay('2.5', 1.0) == 2.5
+    assert retry_delay(None, 1.0) == 1.0
+    assert retry_delay('soon', 1.0) == 1.0
+    assert retry_delay(format_datetime(datetime.now(timezone.utc) - timedelta(minutes=1), usegmt=True), 1.0) == 0
+    later = format_datetime(datetime.now(timezone.utc) + timedelta(seconds=30), usegmt=True)
+    assert 25 < retry_delay(later, 1.0) <= 30
+
+
+def test_chunks_are_fetched_in_order():
+    with StubCandleServer() as server:
+        df = data_generation(server.url).get_instruments_df()
+        assert server.requests == 5
+    assert len(df) == 120
+    assert df['time'].is_monotonic_increasing and df['time'].is_unique
+    assert str(df['time'].dtype) == 'datetime64[ns, UTC]'
+
+
+def test_parallel_download_equals_serial():
+    with StubCandleServer() as server:
+        serial = data_generation(server.url).get_instruments_df()
+        parallel = data_generation(server.url, max_workers=4).get_instruments_df()
+    assert parallel.equals(serial)
+
+
+@pytest.mark.parametrize('failure', [
+    (429, {}),
+    (429, {'Retry-After': '0'}),
+    (429, {'Retry-After': 'Thu, 01 Jan 2015 00:00:00 GMT'}),
+    (500, {}),
+    (503, {'Retry-After': '0'}),
+])
+def test_throttling_and_server_errors_are_retried(failure):
+    with StubCandleServer() as server:
+        expected = data_generation(server.url).get_instruments_df()
+    with StubCandleServer([failure, failure]) as server:
+        df = data_generation(server.url).get_instruments_df()
+        assert server.requests == 5 + 2
+    assert df.equals(expected)
+
+
+def test_retries_are_bounded():
+    with StubCandleServer([(503, {})] * 3) as server:
+        with pytest.raises(RuntimeError, match='503'):
+            data_generation(server.url, max_retries=2).get_instruments_df()
+        assert server.requests == 3
+
+
+def test_client_errors_are_not_retried():
+    with StubCandleServer([(404, {})]) as server:
+        with pytest.raises(RuntimeError, match='404'):
+            data_generation(server.url).get_instruments_df()
+        assert server.requests == 1
+
+
+def test_iter_candles_matches_the_download():
+    with StubCandleServer() as server:
+        source = data_generation(server.url)
+        expected = source.get_instruments_df()
+        candles = list(source.iter_candles())
+    assert len(candles) == len(expected)
+    assert np.array_equal([candle['ask_c'] for candle in candles], expected['ask_c'])
@@ -0,0 +1,73 @@
+import numpy as np
+import pytest
+
+from Strategies.ExitResolver import ExitResolver, IntrabarFill
+
+
+@pytest.fixture
+def prices():
+    rng = np.random.default_rng(7)
+    close = 1.1 + np.cumsum(rng.normal(0, 0.0005, 3000))
+    low = close - np.abs(rng.normal(0, 0.0004, 3000))
+    high = close + np.abs(rng.normal(0, 0.0004, 3000))
+    close[[100, 101, 2000]] = np.nan
+    return close, low, high
+
+
+def first_exit(resolver, start, lower, upper):
+    """Reference `ExitResolver.first_exits` for one position, candle by candle."""
+    for j in range(start, len(resolver.prices)):
+        if resolver.prices[j] <= lower or resolver.high[j] >= upper:
+            return j
+    return -1
+
+
+@pytest.mark.parametrize('max_cells', [1, 1000, 2 ** 22])
+def test_first_exits_equals_the_scalar_scan(prices, max_cells):
+    close, _, _ = prices
+    rng = np.random.default_rng(8)
+    starts = rng.integers(0, 3100, 500)
+    width = rng.uniform(0.0001, 0.02, 500)
+    center = close[np.minimum(starts, 2999)]
+    lower, upper = center - width, center + width * rng.uniform(0.5, 2, 500)
+    resolver = ExitResolver(close, block_size=4, max_cells=max_cells)
+    expected = [first_exit(resolver, *args) for args in zip(starts.tolist(), lower.tolist(), upper.tolist())]
+    np.testing.assert_array_equal(resolver.first_exits(starts, lower, upper), expected)
+
+
+def scalar_fill(fill, start, stop_loss, take_profit, long):
+    """Reference `IntrabarFill.first_exits` for one position, as written before it was vectorized."""
+    lower, upper = (stop_loss, take_profit) if long else (take_profit, stop_loss)
+    j = first_exit(fill.resolver, start, lower, upper)
+    if j < 0:
+        return -1, np.nan
+    open_price = fill.open[j]
+    if open_price <= lower or open_price >= upper:
+        return j, open_price
+    hit_lower, hit_upper = fill.resolver.prices[j] <= lower, fill.resolver.high[j] >= upper
+    if hit_lower and hit_upper:
+        if fill.tie_break == 'stop_loss':
+            return j, stop_loss
+        if fill.tie_break == 'take_profit':
+            return j, take_profit
+        return j, lower if open_price - lower <= upper - open_price else upper
+    return j, lower if hit_lower else upper
+
+
+@pytest.mark.parametrize('tie_break', IntrabarFill.tie_breaks)
+def test_intrabar_first_exits_equals_the_scalar_fill(prices, tie_break):
+    close, low, high = prices
+    rng = np.random.default_rng(9)
+    starts = rng.integers(0, 3000, 400)
+    long = rng.random(400) < 0.5
+    atr = rng.uniform(0.00005, 0.003, 400)
+    entry = np.nan_to_num(close[starts], nan=1.1)
+    stop_loss = np.where(long, entry - 3 * atr, entry + 3 * atr)
+    take_profit = np.where(long, entry + 6 * atr, entry - 6 * atr)
+    fill = IntrabarFill(np.r_[close[0], close[:-1]], low, high, tie_break, block_size=8)
+
+    exits, fill_prices = fill.first_exits(starts, stop_loss, take_profit, long)
+    expected = [scalar_fill(fill, *args)
+                for args in zip(starts.tolist(), stop_loss.tolist(), take_profit.tolist(), long.tolist())]
+    np.testing.assert_array_equal(exits, [j for j, _ in expected])
+    np.testing.assert_array_equal(fill_prices, [price for _, price in expected])
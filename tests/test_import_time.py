@@ -0,0 +1,11 @@
+import pytest
+
+from benchmarks.import_time import budgets, import_time
+
+
+@pytest.mark.parametrize('module', list(budgets))
+def test_core_modules_stay_lightweight(module):
+    # Only the forbidden imports are pinned here; times depend on the machine
+    _, forbidden = budgets[module]
+    loaded = import_time(module, repeat=1)['loaded']
+    assert not [name for name in forbidden if name in loaded]
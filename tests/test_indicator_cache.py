@@ -0,0 +1,90 @@
+import os
+import time
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from Indicators.ATR import ATR
+from Indicators.IndicatorCache import IndicatorCache
+from Indicators.MA import MA
+from Strategies.PriceMACrossover import PriceMACrossover
+from Strategies.Strategy import Strategy
+from benchmarks.synthetic import synthetic_candles
+
+
+@pytest.fixture
+def candles():
+    df = synthetic_candles(500, seed=2)
+    df.loc[[30, 31], 'ask_c'] = np.nan
+    df.loc[200, 'ask_h'] = np.nan
+    return df
+
+
+@pytest.mark.parametrize('method', ATR.methods)
+def test_with_indicators_equals_calculate_MA_then_ATR(candles, method):
+    expected = candles.copy()
+    for size in (5, 20):
+        expected = MA().calculate_MA(size, expected)
+    expected = ATR().calculate_ATR(15, expected, method)
+    original = candles.copy()
+    result = IndicatorCache().with_indicators(candles, MA_sizes=(5, 20), ATR_periods=(15,), ATR_method=method)
+    pd.testing.assert_frame_equal(result, expected.reset_index(drop=True))
+    pd.testing.assert_frame_equal(candles, original)
+
+
+def test_results_are_read_only(candles):
+    values = IndicatorCache().MA(candles, 10)
+    with pytest.raises(ValueError):
+        values[0] = 1.0
+
+
+def test_memory_tier_evicts_least_recently_used(candles):
+    cache = IndicatorCache(max_bytes=2 * 8 * len(candles))  # Two results
+    first, second = cache.MA(candles, 5), cache.MA(candles, 10)
+    assert cache.MA(candles, 5) is first  # 5 is now the most recently used
+    cache.MA(candles, 20)
+    assert cache.info() == {'entries': 2, 'bytes': 2 * 8 * len(candles), 'hits': 1, 'disk_hits': 0, 'misses': 3}
+    assert cache.MA(candles, 5) is first
+    cache.MA(candles, 10)
+    assert cache.info()['misses'] == 4
+
+
+def test_disk_tier_is_read_back_and_bounded(tmp_path, candles):
+    cache = IndicatorCache(cache_dir=tmp_path)
+    expected = cache.MA(candles, 5)
+    reloaded = IndicatorCache(cache_dir=tmp_path)
+    np.testing.assert_array_equal(reloaded.MA(candles, 5), expected)
+    assert reloaded.info()['disk_hits'] == 1 and reloaded.info()['misses'] == 0
+
+    size = os.path.getsize(next(tmp_path.iterdir()))
+    bounded = IndicatorCache(cache_dir=tmp_path, max_disk_bytes=2 * size)
+    for MA_size in (10, 20, 30):
+        bounded.MA(candles, MA_size)
+    assert len(os.listdir(tmp_path)) == 2
+
+
+def test_evict_by_age_and_size(tmp_path, candles):
+    cache = IndicatorCache(cache_dir=tmp_path)
+    for MA_size in (5, 10, 20):
+        cache.MA(candles, MA_size)
+    names = sorted(os.listdir(tmp_path))
+    old = time.time() - 3600
+    os.utime(tmp_path / names[0], (old, old))
+
+    assert cache.evict(max_age=60) == [names[0][:-len('.npy')]]
+    size = os.path.getsize(tmp_path / names[1])
+    assert len(cache.evict(max_bytes=size)) == 1
+    assert len(os.listdir(tmp_path)) == 1
+    assert IndicatorCache().evict(max_bytes=0) == []  # No disk tier
+
+
+def test_strategies_take_the_cache_by_position(candles):
+    df = ATR().calculate_ATR(15, candles)
+    cache = IndicatorCache()
+    first = PriceMACrossover(df, 10000, 'constant', cache).run_strategy(20)
+    second = PriceMACrossover(df, 10000, 'constant', cache).run_strategy(20)
+    assert cache.info()['misses'] == 1 and cache.info()['hits'] == 1
+    pd.testing.assert_frame_equal(first, second)
+    with pytest.raises(TypeError):
+        Strategy(df, 10000, 'constant', cache)
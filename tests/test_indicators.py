@@ -0,0 +1,129 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from Indicators.ATR import ATR
+from Indicators.MA import MA, RollingWindowMean
+from Indicators.TPO import TPO
+from benchmarks.synthetic import synthetic_candles
+
+
+def baseline_MA(MA_size, df):
+    """The original row-by-row `MA.calculate_MA`."""
+    df[f'ma{MA_size}'] = 0.0
+    for i in range(len(df)):
+        window_size = min(i + 1, MA_size)
+        df.at[i, f'ma{MA_size}'] = df['ask_c'].iloc[:i + 1].rolling(window=window_size).mean().iloc[-1]
+    return df
+
+
+def baseline_ATR(ATR_period, df):
+    """The original row-by-row `ATR.calculate_ATR`, on candles without missing values."""
+    high_low = df['ask_h'] - df['ask_l']
+    high_close = abs(df['ask_h'] - df['ask_c'].shift(1))
+    low_close = abs(df['ask_l'] - df['ask_c'].shift(1))
+    true_range = pd.concat([high_low, high_close, low_close], axis=1).max(axis=1)
+    df[f'ATR{ATR_period}'] = 0.0
+    for i in range(len(df)):
+        window_size = min(i + 1, ATR_period)
+        df.at[i, f'ATR{ATR_period}'] = true_range.iloc[:i + 1].rolling(window=window_size).mean().iloc[-1]
+    return df
+
+
+def baseline_TPO(df, NOfCandles, step, top_k=5):
+    """The original `TPO.calculate_TPO`, bins from each window's lowest low."""
+    rows = []
+    for i in range(NOfCandles, len(df)):
+        window = df.iloc[i - NOfCandles:i]
+        bins = np.arange(window['ask_l'].min(), window['ask_h'].max() + step, step)
+        counts = {price: 0 for price in bins}
+        for _, row in window.iterrows():
+            for price in bins:
+                if row['ask_l'] <= price <= row['ask_h']:
+                    counts[price] += 1
+        for price, count in sorted(counts.items(), key=lambda x: x[1], reverse=True)[:top_k]:
+            rows.append({'Time': df.iloc[i]['time'], 'Price': price, 'TPO': count})
+    return pd.DataFrame(rows)
+
+
+@pytest.fixture
+def candles():
+    return synthetic_candles(400, seed=3)
+
+
+@pytest.mark.parametrize('MA_size', [1, 2, 7, 20])
+def test_MA_equals_the_original_loop(candles, MA_size):
+    candles.loc[[0, 30, 31, 200], 'ask_c'] = np.nan
+    expected = baseline_MA(MA_size, candles.copy())[f'ma{MA_size}']
+    np.testing.assert_array_equal(MA().calculate_MA(MA_size, candles.copy())[f'ma{MA_size}'], expected)
+    np.testing.assert_array_equal(MA().calculate_MAs([MA_size], candles)[f'ma{MA_size}'], expected)
+
+
+@pytest.mark.parametrize('MA_sizes', [[1, 2], [7, 20, 100]])
+def test_shared_prefix_sums_agree_with_calculate_MA(candles, MA_sizes):
+    candles.loc[[0, 30, 31, 200], 'ask_c'] = np.nan
+    exact = MA().calculate_MAs(MA_sizes, candles)
+    shared = MA().calculate_MAs(MA_sizes, candles, exact=False)
+    pd.testing.assert_frame_equal(shared, exact, check_exact=False, rtol=1e-12)
+
+
+@pytest.mark.parametrize('MA_size', [1, 7, 20])
+def test_MA_update_equals_calculate_MA(candles, MA_size):
+    candles.loc[[30, 31, 200], 'ask_c'] = np.nan
+    expected = MA().calculate_MA(MA_size, candles.copy())[f'ma{MA_size}']
+    ma = MA(MA_size)
+    np.testing.assert_array_equal([ma.update(candle) for candle in candles.to_dict('records')], expected)
+
+
+@pytest.mark.parametrize('ATR_period', [1, 5, 15])
+def test_ATR_equals_the_original_loop(candles, ATR_period):
+    expected = baseline_ATR(ATR_period, candles.copy())[f'ATR{ATR_period}']
+    np.testing.assert_array_equal(ATR().calculate_ATR(ATR_period, candles)[f'ATR{ATR_period}'], expected)
+
+
+@pytest.mark.parametrize('method', ATR.methods)
+def test_ATR_update_equals_calculate_ATR(candles, method):
+    candles.loc[[40, 41], 'ask_h'] = np.nan
+    candles.loc[90, 'volume'] = None
+    expected = ATR().calculate_ATR(15, candles.copy(), method)
+    atr = ATR(15, method)
+    streamed = {candle['time']: atr.update(candle) for candle in candles.to_dict('records')}
+    np.testing.assert_array_equal([streamed[time] for time in expected['time']], expected['ATR15'])
+
+
+@pytest.mark.parametrize('NOfCandles, step, top_k', [(1, 0.0001, 3), (20, 0.0001, 5), (30, 0.0005, 40),
+                                                     (10, 0.01, 5)])
+def test_TPO_update_equals_calculate_TPO(candles, NOfCandles, step, top_k):
+    candles.loc[[50, 51], 'ask_l'] = np.nan
+    expected = TPO().calculate_TPO(candles, NOfCandles, step, top_k)
+    tpo = TPO(NOfCandles, step, top_k)
+    rows = [(candle['time'], price, count)
+            for candle in candles.to_dict('records') for price, count in tpo.update(candle) or []]
+    assert pd.DataFrame(rows, columns=['Time', 'Price', 'TPO']).equals(expected)
+
+
+@pytest.mark.parametrize('NOfCandles, step, top_k', [(1, 1.0, 5), (10, 1.0, 5), (20, 0.5, 8)])
+def test_TPO_equals_the_original_loop(NOfCandles, step, top_k):
+    # Lows and highs on the grid, exact in binary, so the original's bins are grid levels too
+    rng = np.random.default_rng(NOfCandles)
+    low = 100 + np.cumsum(rng.integers(-3, 4, 300)) * step
+    df = pd.DataFrame({'time': np.arange(300), 'ask_l': low, 'ask_h': low + rng.integers(0, 6, 300) * step})
+    expected = baseline_TPO(df, NOfCandles, step, top_k)
+    pd.testing.assert_frame_equal(TPO().calculate_TPO(df, NOfCandles, step, top_k), expected, check_dtype=False)
+
+
+def test_TPO_counts_candles_narrower_than_a_level(candles):
+    # At this step most candles touch no grid level; each still counts at its nearest one
+    profile = TPO().calculate_TPO(candles, 10, step=0.01, top_k=5)
+    assert profile['Time'].nunique() == len(candles) - 10
+    assert (profile.groupby('Time')['TPO'].max() >= 1).all()
+
+
+@pytest.mark.parametrize('window', [1, 2, 5, 20])
+def test_rolling_window_mean_equals_pandas(window):
+    rng = np.random.default_rng(window)
+    values = 1.1 + np.cumsum(rng.normal(0, 0.0005, 2000))
+    values[[50, 51, 300, 1500]] = np.nan
+    average = RollingWindowMean(window)
+    streamed = [average.update(value) for value in values]
+    np.testing.assert_array_equal(streamed, pd.Series(values).rolling(window).mean().to_numpy())
@@ -0,0 +1,21 @@
+import json
+
+from Indicators.ATR import ATR
+from Strategies.MACrossover import MACrossover
+from utils.Instrumentation import instrumentation
+
+
+def test_captured_report_is_json_serializable(make_candles):
+    df = ATR().calculate_ATR(15, make_candles(seed=3))
+    with instrumentation.capture(trace_memory=True):
+        MACrossover(df, 10000).run_strategy(10, 30)
+    report = json.loads(json.dumps(instrumentation.report().to_dict()))
+    assert report['counters']['signals'] > 0 and report['counters']['exit-scan steps'] > 0
+    assert report['timers']['Strategy.resolve_trades']['calls'] == 1
+    assert report['memory']['peak_bytes'] > 0
+
+
+def test_disabled_instrumentation_records_nothing(make_candles):
+    instrumentation.reset()
+    MACrossover(ATR().calculate_ATR(15, make_candles(500)), 10000).run_strategy(10, 30)
+    assert instrumentation.report().to_dict()['counters'] == {}
@@ -0,0 +1,83 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from Strategies.Strategy import Strategy
+
+SPREAD = 0.0002
+ATR = 0.001  # Levels 3 ATR (stop-loss) and 6 ATR (take-profit) from the entry
+
+
+def candle_time(k):
+    return pd.Timestamp('2024-01-01', tz='UTC') + k * pd.Timedelta('5min')
+
+
+def candles(bid):
+    """Candles from (open, high, low, close) bid rows, the ask SPREAD above."""
+    bid = np.asarray(bid, dtype=np.float64)
+    df = pd.DataFrame({'time': [candle_time(k) for k in range(len(bid))]})
+    for kind, values in zip('ohlc', bid.T):
+        df[f'bid_{kind}'] = values
+        df[f'ask_{kind}'] = values + SPREAD
+    df['ATR15'] = ATR
+    return df
+
+
+def run(bid, signals, tie_break='stop_loss'):
+    signals = np.asarray(signals, dtype=np.float64)
+    strategy = Strategy(candles(bid), 10000, signal_rule=lambda close: signals, fill_model='intrabar',
+                        tie_break=tie_break)
+    return strategy.run_strategy()
+
+
+def test_long_enters_on_the_ask_and_exits_on_the_bid():
+    # Entry at the ask open 1.1002: stop-loss 1.0972, take-profit 1.1062
+    log = run([(1.1000, 1.1005, 1.0995, 1.1000),
+               (1.1000, 1.1010, 1.0990, 1.1000),
+               (1.1000, 1.1061, 1.0990, 1.1050),  # Only the ask high reaches the take-profit
+               (1.1050, 1.1070, 1.1040, 1.1060)], [0, 1, 0, 0])
+    assert len(log) == 1
+    trade = log.iloc[0]
+    assert trade['Entry Price'] == pytest.approx(1.1002)
+    assert trade['Exit Price'] == pytest.approx(1.1062)
+    assert (trade['Start Time'], trade['End Time']) == (candle_time(1), candle_time(3))
+
+
+def test_short_enters_on_the_bid_and_exits_on_the_ask():
+    # Entry at the bid open 1.1000: stop-loss 1.1030, take-profit 1.0940
+    log = run([(1.1000, 1.1005, 1.0995, 1.1000),
+               (1.1000, 1.1010, 1.0990, 1.1000),
+               (1.1000, 1.1010, 1.0939, 1.0950),  # Only the bid low reaches the take-profit
+               (1.0950, 1.0960, 1.0930, 1.0935)], [0, -1, 0, 0])
+    assert len(log) == 1
+    assert log['Entry Price'].iloc[0] == pytest.approx(1.1000)
+    assert log['Exit Price'].iloc[0] == pytest.approx(1.0940)
+    assert log['End Time'].iloc[0] == candle_time(3)
+
+
+def test_gap_through_a_level_fills_at_the_open():
+    log = run([(1.1000, 1.1005, 1.0995, 1.1000),
+               (1.1000, 1.1010, 1.0990, 1.1000),
+               (1.0950, 1.0960, 1.0940, 1.0955)], [0, 1, 0])  # Opens below the 1.0972 stop-loss
+    assert log['Exit Price'].iloc[0] == pytest.approx(1.0950)
+
+
+@pytest.mark.parametrize('tie_break, open_price, exit_price', [
+    ('stop_loss', 1.1000, 1.0972),
+    ('take_profit', 1.1000, 1.1062),
+    ('open', 1.1000, 1.0972),  # The open is closer to the stop-loss
+    ('open', 1.1050, 1.1062),  # and here to the take-profit
+])
+def test_candle_touching_both_levels(tie_break, open_price, exit_price):
+    log = run([(1.1000, 1.1005, 1.0995, 1.1000),
+               (1.1000, 1.1010, 1.0990, 1.1000),
+               (open_price, 1.1070, 1.0960, 1.1000)], [0, 1, 0], tie_break)
+    assert log['Exit Price'].iloc[0] == pytest.approx(exit_price)
+
+
+def test_fill_model_and_tie_break_are_validated():
+    df = candles([(1.1, 1.1, 1.1, 1.1)] * 3)
+    with pytest.raises(ValueError, match='fill model'):
+        Strategy(df, 10000, fill_model='tick')
+    with pytest.raises(ValueError, match='tie-break'):
+        Strategy(df, 10000, fill_model='intrabar', tie_break='close')
@@ -0,0 +1,83 @@
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.OHLC import OHLC, attach, share
+
+
+@pytest.fixture
+def df(make_candles):
+    df = make_candles(50)
+    df['time'] = pd.to_datetime(df['time']).dt.tz_convert('Europe/London')
+    df['ask_c'] = df['ask_c'].map(lambda price: f'{price:.5f}')  # Prices as the API returns them
+    return df
+
+
+def test_from_df_keeps_tz_aware_times_as_datetime64(df):
+    data = OHLC.from_df(df)
+    assert data.time.dtype.kind == 'M' and str(data.tz) == 'Europe/London'
+    np.testing.assert_array_equal(data.time, df['time'].dt.tz_convert('UTC').dt.tz_localize(None).to_numpy())
+    assert np.shares_memory(data['bid_c'], df['bid_c'].to_numpy())
+    assert data['ask_c'].dtype == np.float64
+
+    restored = data.to_df()
+    assert restored['time'].dtype == df['time'].dtype
+    pd.testing.assert_frame_equal(restored, df.assign(ask_c=pd.to_numeric(df['ask_c'])))
+
+
+def test_naive_times_stay_as_given(df):
+    data = OHLC.from_df(df.assign(time=df['time'].dt.strftime('%Y-%m-%dT%H:%M:%SZ')), ['bid_c'])
+    assert data.tz is None and data.time.dtype == object
+    assert data.to_df()['time'].tolist() == df['time'].dt.strftime('%Y-%m-%dT%H:%M:%SZ').tolist()
+
+
+def test_items_are_read_only_views(df):
+    data = OHLC.from_df(df)
+    for name in ('time', 'bid_c'):
+        view = data[name]
+        with pytest.raises(ValueError):
+            view[0] = view[1]
+        assert np.shares_memory(view, data.time if name == 'time' else data.columns[name])
+    with pytest.raises(ValueError):
+        data.add('ma5', np.zeros(3))
+
+
+def test_select_and_take_keep_the_time_zone(df):
+    data = OHLC.from_df(df)
+    assert data.select(['bid_c']).tz == data.tz
+    taken = data.take(data['bid_c'] > np.median(data['bid_c']))
+    assert taken.tz == data.tz and len(taken) == 25
+
+
+def summarize(spec):
+    block, data = attach(spec)
+    try:
+        return data.tz, data.time[[0, -1]], float(data['bid_c'].sum()), data['bid_c'].flags.writeable
+    finally:
+        del data
+        block.close()
+
+
+@pytest.mark.parametrize('strings', [False, True])
+def test_share_and_attach_round_trip(df, strings):
+    data = OHLC.from_df(df)
+    if strings:
+        data = OHLC(np.asarray(df['time'].astype(str), dtype=object), data.columns)
+    block, spec = share(data)
+    try:
+        with ProcessPoolExecutor(1) as pool:
+            tz, ends, total, writeable = pool.submit(summarize, spec).result()
+        assert tz == data.tz and not writeable
+        np.testing.assert_array_equal(ends, data.time[[0, -1]])
+        assert total == float(data['bid_c'].sum())
+
+        attached_block, attached = attach(spec)
+        for name in data.columns:
+            np.testing.assert_array_equal(attached[name], data[name])
+        del attached
+        attached_block.close()
+    finally:
+        block.close()
+        block.unlink()
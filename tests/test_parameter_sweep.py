@@ -0,0 +1,13 @@
+import pandas as pd
+
+from Indicators.ATR import ATR
+from Strategies.ParameterSweep import ParameterSweep
+
+
+def test_parallel_sweep_equals_serial(make_candles):
+    df = ATR().calculate_ATR(15, make_candles(seed=3))
+    params = [(5, 30), (10, 50), (20, 100)]
+    serial = ParameterSweep(df, 10000, max_workers=1).run(params, ('constant', 'altering_8_step'))
+    parallel = ParameterSweep(df, 10000, max_workers=2).run(params, ('constant', 'altering_8_step'))
+    assert len(serial) == 6
+    pd.testing.assert_frame_equal(parallel, serial)
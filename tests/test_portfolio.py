@@ -0,0 +1,33 @@
+import pandas as pd
+
+from Indicators.ATR import ATR
+from Strategies.MACrossover import MACrossover
+from Strategies.Portfolio import Portfolio
+
+
+def test_portfolio_of_one_instrument_takes_the_strategy_trades(make_candles):
+    df = ATR().calculate_ATR(15, make_candles(seed=3))
+    single = MACrossover(df, 10000).run_strategy(10, 30)
+    portfolio = Portfolio({'EUR_USD': df}, 10000, max_workers=1).run_strategy(10, 30)
+    assert (portfolio['Instrument'] == 'EUR_USD').all()
+    # The portfolio books trades in exit order, sizing each entry from the capital of the trades closed before it
+    assert pd.to_datetime(portfolio['End Time']).is_monotonic_increasing
+    fields = ['Start Time', 'End Time', 'Entry Price', 'Exit Price']
+    pd.testing.assert_frame_equal(portfolio[fields].sort_values(fields, ignore_index=True),
+                                  single[fields].sort_values(fields, ignore_index=True))
+
+
+def test_portfolio_workers_agree_and_cap_open_risk(make_candles):
+    instruments = {f'I{k}': ATR().calculate_ATR(15, make_candles(2000, seed=k)) for k in range(3)}
+    serial = Portfolio(instruments, 10000, max_workers=1)
+    uncapped = serial.run_strategy(10, 30)
+    parallel = Portfolio(instruments, 10000, max_workers=2).run_strategy(10, 30)
+    pd.testing.assert_frame_equal(parallel, uncapped)
+    assert serial.skipped_trades == 0
+
+    capped = Portfolio(instruments, 10000, max_open_risk=0.00003, max_workers=1)
+    log = capped.run_strategy(10, 30)
+    assert capped.skipped_trades > 0
+    # Skipped positions include some that never close, which the uncapped log leaves out
+    assert len(log) < len(uncapped)
+    assert set(zip(log['Instrument'], log['Start Time'])) <= set(zip(uncapped['Instrument'], uncapped['Start Time']))
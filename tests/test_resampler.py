@@ -0,0 +1,24 @@
+import numpy as np
+import pytest
+
+from benchmarks.synthetic import synthetic_candles
+from utils.Resampler import Resampler
+
+
+def test_resample_equals_pandas():
+    df = synthetic_candles(1000)
+    df = df.drop(index=range(100, 130)).reset_index(drop=True)  # A gap of 30 candles
+    resampled = Resampler('M5').resample(df, 'H1')
+
+    expected = df.set_index('time').resample('1h').agg(
+        {column: {'o': 'first', 'h': 'max', 'l': 'min', 'c': 'last'}.get(column[-1], 'sum')
+         for column in df.columns if column != 'time'}).dropna().reset_index()
+    assert np.array_equal(resampled['time'], expected['time'])
+    for column in expected.columns.drop('time'):
+        np.testing.assert_array_equal(resampled[column], expected[column])
+
+
+def test_resample_refuses_indicator_columns():
+    df = synthetic_candles(100).assign(ATR15=0.001)
+    with pytest.raises(ValueError, match='ATR15'):
+        Resampler('M5').resample(df, 'H1')
@@ -0,0 +1,63 @@
+import pandas as pd
+import pytest
+
+from Indicators.ATR import ATR
+from Strategies.Robustness import Robustness, block_starts, distribution_stats
+
+
+@pytest.fixture(scope='module')
+def df(make_candles):
+    df = ATR().calculate_ATR(15, make_candles(2000, seed=4))
+    df['time'] = pd.to_datetime(df['time']).dt.tz_convert('America/New_York')
+    return df
+
+
+@pytest.mark.parametrize('n, block_size', [(0, 1), (1, 1), (10, 0), (10, 10), (10, -3)])
+def test_block_starts_rejects_bad_sizes(n, block_size):
+    with pytest.raises(ValueError):
+        block_starts(n, block_size, seed=0, paths=[0])
+
+
+def test_block_starts_are_reproducible_per_path():
+    starts = block_starts(101, 7, seed=3, paths=range(4))
+    assert starts.shape == (4, 15)
+    assert ((starts >= 0) & (starts <= 100 - 7)).all()
+    assert (block_starts(101, 7, seed=3, paths=[2]) == starts[2]).all()
+
+
+def test_monte_carlo_rejects_bad_block_size(df):
+    with pytest.raises(ValueError):
+        Robustness(df, 10000, max_workers=1).monte_carlo(10, 30, n_paths=2, block_size=len(df))
+
+
+def test_monte_carlo_does_not_depend_on_workers(df):
+    # A small memory budget splits the paths into several batches
+    serial = Robustness(df, 10000, max_workers=1, memory_budget=2 ** 20).monte_carlo(10, 30, n_paths=12, seed=7)
+    parallel = Robustness(df, 10000, max_workers=2, memory_budget=2 ** 20).monte_carlo(10, 30, n_paths=12, seed=7)
+    pd.testing.assert_frame_equal(parallel[0], serial[0])
+    assert parallel[1] == serial[1]
+    assert len(serial[0]) == 12
+
+
+def test_distribution_stats_columns():
+    results = pd.DataFrame({'Final Capital': [9000.0, 10500.0, 12000.0, 4000.0],
+                            'Max Drawdown': [0.2, 0.1, 0.05, 0.6],
+                            'Min Capital': [8000.0, 9500.0, 10000.0, 4000.0]})
+    stats = distribution_stats(results, 10000, ruin_level=0.5, percentiles=(50,))
+    assert list(stats) == ['Paths', 'Final Capital Mean', 'Final Capital Std', 'Final Capital P50',
+                           'Max Drawdown Mean', 'Max Drawdown Std', 'Max Drawdown P50',
+                           'Loss Probability', 'Ruin Probability']
+    assert stats['Paths'] == 4 and stats['Final Capital P50'] == 9750.0
+    assert stats['Loss Probability'] == 0.5 and stats['Ruin Probability'] == 0.25
+
+
+def test_walk_forward_splits(df):
+    splits = Robustness(df, 10000, max_workers=1).walk_forward([(5, 20), (10, 30)], train_size=500,
+                                                               test_size=250, step=300)
+    starts = range(0, len(df) - 750 + 1, 300)
+    assert len(splits) == len(starts)
+    time = df['time']
+    for column, offset in (('Train Start', 0), ('Test Start', 500), ('Test End', 749)):
+        assert str(splits[column].dt.tz) == 'America/New_York'
+        assert list(splits[column]) == [time[start + offset] for start in starts]
+    assert set(splits['Params']) <= {(5, 20), (10, 30)}
@@ -0,0 +1,43 @@
+import pandas as pd
+import pytest
+
+from Indicators.ATR import ATR
+from Strategies.MACrossover import MACrossover
+from Strategies.PriceMACrossover import PriceMACrossover
+from Strategies.StreamingBacktest import StreamingBacktest, candles_from_df
+
+strategies = {'MACrossover': (MACrossover, (10, 30)), 'PriceMACrossover': (PriceMACrossover, (20,))}
+
+
+@pytest.fixture(scope='module')
+def df(make_candles):
+    return ATR().calculate_ATR(15, make_candles(seed=3))
+
+
+@pytest.mark.parametrize('risk_type, constant_risk', [('constant', 0.5), ('altering_8_step', 0.01)])
+@pytest.mark.parametrize('strategy', list(strategies))
+def test_streaming_backtest_equals_batch_strategy(df, strategy, risk_type, constant_risk):
+    cls, params = strategies[strategy]
+    batch = cls(df, 10000, risk_type).run_strategy(*params, constant_risk=constant_risk)
+    streaming = StreamingBacktest(10000, risk_type, strategy).run_strategy(candles_from_df(df), *params,
+                                                                          constant_risk=constant_risk)
+    assert len(batch) > 0
+    pd.testing.assert_frame_equal(streaming, batch)
+
+
+@pytest.mark.parametrize('strategy', list(strategies))
+def test_streaming_backtest_computes_atr_like_batch(df, strategy):
+    cls, params = strategies[strategy]
+    batch = cls(df, 10000).run_strategy(*params)
+    streaming = StreamingBacktest(10000, strategy=strategy, ATR_period=15).run_strategy(
+        candles_from_df(df.drop(columns='ATR15')), *params)
+    pd.testing.assert_frame_equal(streaming, batch)
+
+
+def test_streaming_backtest_follows_the_risk_steps(make_candles):
+    # Large pip values make the capital cross the steps of the altering risk
+    df = ATR().calculate_ATR(15, make_candles(seed=3, scale=1000))
+    batch = MACrossover(df, 10000, 'altering_8_step').run_strategy(5, 20)
+    streaming = StreamingBacktest(10000, 'altering_8_step').run_strategy(candles_from_df(df), 5, 20)
+    assert batch['Risk Percentage'].nunique() > 1
+    pd.testing.assert_frame_equal(streaming, batch)
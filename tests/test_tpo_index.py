@@ -0,0 +1,76 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from Indicators.TPO import price_ticks
+from Indicators.TPOIndex import TPOIndex
+from benchmarks.synthetic import synthetic_candles
+
+STEP = 0.0005
+
+
+@pytest.fixture(scope='module')
+def candles():
+    df = synthetic_candles(1000, seed=5)
+    df.loc[[100, 101], 'ask_l'] = np.nan
+    return df
+
+
+@pytest.fixture(scope='module')
+def index(candles):
+    return TPOIndex.from_df(candles, step=STEP, checkpoint=64)
+
+
+def brute_force(candles, first, stop):
+    """{price: TPO count} of the candles at positions [first, stop), one candle at a time."""
+    lo, hi = price_ticks(candles['ask_l'], candles['ask_h'], STEP)
+    counts = {}
+    for k in range(first, stop):
+        for tick in range(lo[k], hi[k] + 1):
+            counts[tick] = counts.get(tick, 0) + 1
+    return {round(tick * STEP, 10): count for tick, count in counts.items()}
+
+
+def ranges():
+    # Ranges starting and stopping on, just before and just after the checkpoints
+    edges = [0, 1, 63, 64, 65, 127, 128, 500, 999, 1000]
+    rng = np.random.default_rng(0)
+    random = np.sort(rng.integers(0, 1001, (40, 2)), axis=1)
+    return [(a, b) for a in edges for b in edges if a <= b] + [tuple(pair) for pair in random]
+
+
+def test_profile_equals_brute_force_count(candles, index):
+    # One more time after the last candle, so position len(candles) is a bound too
+    times = pd.to_datetime(candles['time']).tolist() + [pd.Timestamp('2100-01-01', tz='UTC')]
+    for first, stop in ranges():
+        profile = index.profile(times[first], times[stop])
+        assert dict(zip(profile['Price'], profile['TPO'])) == brute_force(candles, first, stop)
+        assert profile['Price'].is_monotonic_increasing
+
+
+def test_top_levels_and_point_of_control(candles, index):
+    times = pd.to_datetime(candles['time'])
+    for first, stop in [(0, 1000), (63, 65), (64, 128), (10, 500)]:
+        counts = brute_force(candles, first, stop)
+        expected = sorted(counts.items(), key=lambda item: (-item[1], item[0]))[:7]
+        end = times[stop] if stop < len(times) else None
+        top = index.top_levels(times[first], end, top_k=7)
+        assert list(zip(top['Price'], top['TPO'])) == expected
+        assert index.point_of_control(times[first], end) == expected[0]
+
+
+def test_save_and_load_round_trip(tmp_path, candles, index):
+    index.save(tmp_path / 'index')
+    loaded = TPOIndex.load(tmp_path / 'index', mmap_mode='r')
+    assert isinstance(loaded.checkpoints, np.memmap)
+    for name in TPOIndex.arrays:
+        np.testing.assert_array_equal(getattr(loaded, name), getattr(index, name))
+    assert (loaded.base, loaded.step, loaded.checkpoint) == (index.base, index.step, index.checkpoint)
+    pd.testing.assert_frame_equal(loaded.profile(), index.profile())
+
+
+def test_empty_frame():
+    index = TPOIndex.from_df(pd.DataFrame({'time': pd.to_datetime([], utc=True), 'ask_l': [], 'ask_h': []}))
+    assert len(index) == 0
+    assert index.profile().empty and index.top_levels().empty
+    assert index.point_of_control() is None
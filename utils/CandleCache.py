@@ -0,0 +1,257 @@
+import json
+import os
+import shutil
+import time
+
+import numpy as np
+import pandas as pd
+
+from utils.TimeFrames import time_ns
+
+
+class CandleCache:
+    def __init__(self, cache_dir='~/.cache/finance/candles'):
+        """
+        Persistent on-disk candle store with incremental gap-fill.
+
+        Every (instrument, time frame, price components) series lives in its own
+        directory as one `.npy` file per column, memory-mapped on read, plus a
+        `meta.json` recording which time ranges have already been fetched. A
+        request only downloads the ranges that are not covered yet.
+
+        Args:
+            cache_dir (str): Root directory of the cache.
+        """
+        self.cache_dir = os.path.expanduser(cache_dir)
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    @staticmethod
+    def key(instument_name, time_frame, price):
+        """Return the cache key (and directory name) of a candle series."""
+        return f"{instument_name}_{time_frame}_{price}"
+
+    def _path(self, key, name=''):
+        return os.path.join(self.cache_dir, key, name)
+
+    def _read_meta(self, key):
+        path = self._path(key, 'meta.json')
+        if not os.path.exists(path):
+            return None
+        with open(path) as f:
+            return json.load(f)
+
+    def _write_meta(self, key, meta):
+        path = self._path(key, 'meta.json')
+        with open(path + '.tmp', 'w') as f:
+            json.dump(meta, f)
+        os.replace(path + '.tmp', path)
+
+    def _read_columns(self, key, meta):
+        return {col: np.load(self._path(key, f'{col}.npy'), mmap_mode='r') for col in meta['columns']}
+
+    @staticmethod
+    def _merge_ranges(ranges):
+        merged = []
+        for start, end in sorted(ranges):
+            if merged and start <= merged[-1][1]:
+                merged[-1][1] = max(merged[-1][1], end)
+            else:
+                merged.append([start, end])
+        return merged
+
+    @staticmethod
+    def missing_ranges(covered, start, end):
+        """Return the parts of [start, end) not covered by the sorted, disjoint `covered` ranges."""
+        missing = []
+        for covered_start, covered_end in covered:
+            if covered_end <= start:
+                continue
+            if covered_start >= end:
+                break
+            if covered_start > start:
+                missing.append([start, covered_start])
+            start = max(start, covered_end)
+        if start < end:
+            missing.append([start, end])
+        return missing
+
+    @staticmethod
+    def _to_columns(df):
+        """Convert a DataGeneration frame into typed column arrays (time as int64 ns since epoch)."""
+        columns = {'time': time_ns(df['time'])}
+        for col in df.columns.drop('time'):
+            dtype = np.int64 if col == 'volume' else np.float64
+            columns[col] = pd.to_numeric(df[col]).to_numpy(dtype=dtype)
+        return columns
+
+    def _store(self, key, meta, columns):
+        os.makedirs(self._path(key), exist_ok=True)
+        for col, values in columns.items():
+            path = self._path(key, f'{col}.npy')
+            with open(path + '.tmp', 'wb') as f:
+                np.save(f, values)
+            os.replace(path + '.tmp', path)
+        meta['columns'] = list(columns)
+        meta['rows'] = len(columns['time'])
+        self._write_meta(key, meta)
+
+    def fill(self, data_generation):
+        """
+        Make sure the cache covers the start_time/end_time range of `data_generation`.
+
+        Missing ranges are fetched with `data_generation.get_instruments_df` and merged
+        into the cache. Ranges still in progress (less than one candle old) are never
+        marked as covered, so they are fetched again next time.
+
+        Returns:
+            tuple: (key, meta, start, end) with `start`/`end` in ns since epoch.
+        """
+        key = self.key(data_generation.instument_name, data_generation.time_frame, data_generation.price)
+        start = pd.Timestamp(data_generation.start_time).value
+        end = pd.Timestamp(data_generation.end_time).value
+        meta = self._read_meta(key) or {
+            'instument_name': data_generation.instument_name,
+            'time_frame': data_generation.time_frame,
+            'price': data_generation.price,
+            'covered': [],
+        }
+
+        merged = None
+        missing = self.missing_ranges(meta['covered'], start, end)
+        if missing:
+            candle_ns = data_generation.time_frame_to_seconds[data_generation.time_frame] * 10 ** 9
+            settled = time.time_ns() - candle_ns
+            fetched = []
+            for range_start, range_end in missing:
+                df = data_generation.get_instruments_df(
+                    start_time=pd.Timestamp(range_start, tz='UTC').isoformat().replace('+00:00', 'Z'),
+                    end_time=pd.Timestamp(range_end, tz='UTC').isoformat().replace('+00:00', 'Z'),
+                )
+                if len(df):
+                    fetched.append(self._to_columns(df))
+                if range_start < settled:
+                    meta['covered'].append([range_start, min(range_end, settled)])
+            meta['covered'] = self._merge_ranges(meta['covered'])
+
+            if fetched:
+                parts = ([self._read_columns(key, meta)] if meta.get('rows') else []) + fetched
+                merged = {col: np.concatenate([part[col] for part in parts]) for col in fetched[0]}
+                # Keep the newest copy of duplicated candles
+                order = np.argsort(merged['time'], kind='stable')
+                times = merged['time'][order]
+                keep = np.append(times[1:] != times[:-1], True)
+                merged = {col: values[order][keep] for col, values in merged.items()}
+
+        meta['last_access'] = time.time()
+        if merged is not None:
+            self._store(key, meta, merged)
+        else:
+            os.makedirs(self._path(key), exist_ok=True)
+            meta.setdefault('columns', [])
+            meta.setdefault('rows', 0)
+            self._write_meta(key, meta)
+        return key, meta, start, end
+
+    def get_instruments_df(self, data_generation):
+        """
+        Return the candles of `data_generation` between its start_time and end_time.
+
+        Args:
+            data_generation (DataGeneration): Fetcher describing the instrument,
+                time frame, price components and requested time range.
+
+        Returns:
+            pd.DataFrame: 'time' (UTC), 'volume' and the price columns, sorted by time.
+        """
+        key, meta, start, end = self.fill(data_generation)
+        if not meta['rows']:
+            return pd.DataFrame()
+
+        columns = self._read_columns(key, meta)
+        first, last = np.searchsorted(columns['time'], [start, end])
+        return self._slice_df(columns, first, last)
+
+    @staticmethod
+    def _slice_df(columns, first, last):
+        df = pd.DataFrame({col: np.array(values[first:last]) for col, values in columns.items()})
+        df['time'] = pd.to_datetime(df['time'], utc=True)
+        return df
+
+    def iter_candles(self, data_generation, chunksize=100_000):
+        """
+        Yield the candles of `data_generation` one dict at a time, for streaming backtests.
+
+        Rows are read from the memory-mapped columns `chunksize` at a time, so memory
+        stays bounded whatever the length of the range.
+        """
+        key, meta, start, end = self.fill(data_generation)
+        if not meta['rows']:
+            return
+
+        columns = self._read_columns(key, meta)
+        first, last = np.searchsorted(columns['time'], [start, end])
+        for chunk_start in range(first, last, chunksize):
+            yield from self._slice_df(columns, chunk_start, min(chunk_start + chunksize, last)).to_dict('records')
+
+    def info(self):
+        """
+        Describe every cached series.
+
+        Returns:
+            pd.DataFrame: key, instrument, time frame, price, rows, bytes on disk,
+            first/last candle time, covered ranges and last access time.
+        """
+        rows = []
+        for key in sorted(os.listdir(self.cache_dir)):
+            meta = self._read_meta(key)
+            if meta is None:
+                continue
+            size = sum(entry.stat().st_size for entry in os.scandir(self._path(key)) if entry.is_file())
+            times = np.load(self._path(key, 'time.npy'), mmap_mode='r') if meta.get('rows') else []
+            rows.append({
+                'key': key,
+                'instument_name': meta['instument_name'],
+                'time_frame': meta['time_frame'],
+                'price': meta['price'],
+                'rows': meta.get('rows', 0),
+                'bytes': size,
+                'first': pd.Timestamp(int(times[0]), tz='UTC') if len(times) else pd.NaT,
+                'last': pd.Timestamp(int(times[-1]), tz='UTC') if len(times) else pd.NaT,
+                'covered': [(pd.Timestamp(s, tz='UTC'), pd.Timestamp(e, tz='UTC')) for s, e in meta['covered']],
+                'last_access': pd.Timestamp(meta.get('last_access', 0), unit='s', tz='UTC'),
+            })
+        return pd.DataFrame(rows, columns=['key', 'instument_name', 'time_frame', 'price', 'rows', 'bytes',
+                                           'first', 'last', 'covered', 'last_access'])
+
+    def remove(self, key):
+        """Delete one cached series."""
+        shutil.rmtree(self._path(key), ignore_errors=True)
+
+    def evict(self, max_bytes=None, max_age=None):
+        """
+        Delete cached series by age and/or total size.
+
+        Args:
+            max_bytes (int): Remove least recently used series until the cache fits in this size.
+            max_age (float): Remove series not accessed for more than this many seconds.
+
+        Returns:
+            list: Keys of the removed series.
+        """
+        entries = self.info().sort_values('last_access')
+        removed = []
+        if max_age is not None:
+            cutoff = pd.Timestamp(time.time() - max_age, unit='s', tz='UTC')
+            for key in entries.loc[entries['last_access'] < cutoff, 'key']:
+                self.remove(key)
+                removed.append(key)
+            entries = entries[~entries['key'].isin(removed)]
+        if max_bytes is not None:
+            total = entries['bytes'].sum()
+            for key, size in zip(entries['key'], entries['bytes']):
+                if total <= max_bytes:
+                    break
+                self.remove(key)
+                removed.append(key)
+                total -= size
+        return removed
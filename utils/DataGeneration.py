@@ -1,10 +1,41 @@
-from utils.args import get_args
-import pandas as pd
-import requests
-from datetime import datetime, timedelta
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from email.utils import parsedate_to_datetime
+from operator import itemgetter
+
+import numpy as np
+
+from utils.Instrumentation import instrumentation
+from utils.TimeFrames import time_frame_to_seconds
+
+
+def retry_delay(retry_after, default):
+    """
+    Seconds to wait before a retry, from a `Retry-After` header.
+
+    The header is either a number of seconds or an HTTP date; `default` is returned
+    when it is missing or can't be read.
+    """
+    if not retry_after:
+        return default
+    try:
+        return max(float(retry_after), 0.0)
+    except ValueError:
+        pass
+    try:
+        when = parsedate_to_datetime(retry_after)
+    except (TypeError, ValueError):
+        return default
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    return max((when - datetime.now(timezone.utc)).total_seconds(), 0.0)
 
 
 class DataGeneration:
+    time_frame_to_seconds = time_frame_to_seconds
+
     def __init__(self,
                  instument_name: str = 'EUR_USD',
                  time_frame: str = 'H1',
@@ -12,16 +43,32 @@ class DataGeneration:
                  start_time: str = '',
                  end_time: str = '',
                  price: str = 'MBA',
-                 MaxReturnedCandleLimit: int = 5000):
-        args = get_args()
+                 MaxReturnedCandleLimit: int = 5000,
+                 max_workers: int = 1,
+                 max_retries: int = 3,
+                 backoff: float = 0.5,
+                 service_url: str = None,
+                 headers: dict = None):
+        import requests
+
+        # An explicit service_url (e.g. a local stub server) doesn't need the account settings
+        if service_url is None:
+            from utils.args import get_args
+
+            args = get_args()
+            service_url, headers = args.SERVICE_URL, args.SECURE_HEADER if headers is None else headers
         self.instument_name = instument_name
         self.time_frame = time_frame
         self.count = count
         self.start_time = start_time
         self.end_time = end_time
         self.MaxReturnedCandleLimit = MaxReturnedCandleLimit
-        self.URL = f"{args.SERVICE_URL}/instruments/{instument_name}/candles"
+        self.URL = f"{service_url}/instruments/{instument_name}/candles"
         self.session = requests.Session()
+        self.max_workers = max_workers
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self._local = threading.local()
         self.price = price
         self.prices_list = []
         if 'M' in self.price:
@@ -30,7 +77,8 @@ class DataGeneration:
             self.prices_list.append('bid')
         if 'A' in self.price:
             self.prices_list.append('ask')
-        self.headers = args.SECURE_HEADER
+        self.price_columns = [f"{price}_{oh}" for price in self.prices_list for oh in ['o', 'h', 'l', 'c']]
+        self.headers = headers or {}
         self.params = dict(
             granularity=self.time_frame,
             price=self.price
@@ -38,74 +86,152 @@ class DataGeneration:
 
     def calculate_time_interval(self):
         """Calculate the time interval for each API call based on MaxReturnedCandleLimit."""
-        time_frame_to_seconds = {
-            'S5': 5,
-            'S10': 10,
-            'S15': 15,
-            'S30': 30,
-            'M1': 60,
-            'M2': 120,
-            'M5': 300,
-            'M15': 900,
-            'M30': 1800,
-            'H1': 3600,
-            'H4': 14400,
-            'D': 86400
-        }
-        if self.time_frame not in time_frame_to_seconds:
+        if self.time_frame not in self.time_frame_to_seconds:
             raise ValueError(f"Unsupported time frame: {self.time_frame}")
-        interval_seconds = time_frame_to_seconds[self.time_frame] * self.MaxReturnedCandleLimit
+        interval_seconds = self.time_frame_to_seconds[self.time_frame] * self.MaxReturnedCandleLimit
         return timedelta(seconds=interval_seconds)
 
     def get_data(self):
         self.response = self.session.get(self.URL, params=self.params, headers=self.headers)
         return self.response.status_code, self.response.json()
 
-    def get_instruments_df(self):
-        if not self.start_time or not self.end_time:
+    def plan_chunks(self, start_time=None, end_time=None):
+        """
+        Split [start_time, end_time) into (from, to) request windows of at most MaxReturnedCandleLimit candles.
+
+        `start_time` and `end_time` default to the ones given to the constructor.
+        """
+        start_time = start_time or self.start_time
+        end_time = end_time or self.end_time
+        if not start_time or not end_time:
             raise ValueError("Both start_time and end_time must be provided in ISO 8601 format.")
 
-        start_dt = datetime.fromisoformat(self.start_time.replace('Z', '+00:00'))
-        end_dt = datetime.fromisoformat(self.end_time.replace('Z', '+00:00'))
+        start_dt = datetime.fromisoformat(start_time.replace('Z', '+00:00'))
+        end_dt = datetime.fromisoformat(end_time.replace('Z', '+00:00'))
         interval = self.calculate_time_interval()
 
-        all_data = []
-
+        chunks = []
         while start_dt < end_dt:
             current_end_dt = min(start_dt + interval, end_dt)
             # Adjust time format to remove +00:00 and add Z
-            self.params['from'] = start_dt.isoformat().replace('+00:00', 'Z')
-            self.params['to'] = current_end_dt.isoformat().replace('+00:00', 'Z')
-
-            # Debugging: Print the formatted parameters
-            print(f"Requesting data from {self.params['from']} to {self.params['to']}")
-            print(f"Params: {self.params}")
-
-            code, data = self.get_data()
-
-            # Debugging: Print response status and content
-            print(f"Response status: {code}")
-            if code != 200:
-                print(f"Response content: {self.response.text}")  # Print the raw response for debugging
-
-            if code == 200:
-                ohlc = ['o', 'h', 'l', 'c']
-                for candle in data['candles']:
-                    if not candle['complete']:
-                        continue
-                    new_dict = {
-                        'time': candle['time'],
-                        'volume': candle['volume']
-                    }
-                    for price in self.prices_list:
-                        for oh in ohlc:
-                            new_dict[f"{price}_{oh}"] = candle[price][oh]
-                    all_data.append(new_dict)
-            else:
-                raise RuntimeError(f"Failed to fetch data. Status code: {code}. Response: {self.response.text}")
-
-            # Update the start date for the next iteration
+            chunks.append((start_dt.isoformat().replace('+00:00', 'Z'),
+                           current_end_dt.isoformat().replace('+00:00', 'Z')))
             start_dt = current_end_dt
+        return chunks
+
+    def _thread_session(self):
+        """Return a requests.Session owned by the calling thread."""
+        import requests
+
+        if not hasattr(self._local, 'session'):
+            self._local.session = requests.Session()
+        return self._local.session
+
+    def fetch_chunk(self, chunk, session=None):
+        """
+        Fetch one (from, to) window, retrying 429 and 5xx responses with exponential backoff.
+
+        A `Retry-After` header from the server, in seconds or as an HTTP date, takes
+        precedence over the backoff delay.
+
+        Returns:
+            dict: The parsed candle columns of the window, see `parse_candles`.
+        """
+        import requests
+
+        params = dict(self.params)
+        params['from'], params['to'] = chunk
+        session = session or self._thread_session()
+
+        for attempt in range(self.max_retries + 1):
+            try:
+                with instrumentation.timer('DataGeneration.request'):
+                    response = session.get(self.URL, params=params, headers=self.headers)
+            except requests.ConnectionError:
+                if attempt == self.max_retries:
+                    raise
+                instrumentation.count('fetch retries')
+                time.sleep(self.backoff * 2 ** attempt)
+                continue
+            if response.status_code == 200:
+                instrumentation.count('chunks fetched')
+                return self.parse_candles(response.json())
+            if (response.status_code != 429 and response.status_code < 500) or attempt == self.max_retries:
+                break
+            instrumentation.count('fetch retries')
+            time.sleep(retry_delay(response.headers.get('Retry-After'), self.backoff * 2 ** attempt))
+
+        raise RuntimeError(f"Failed to fetch data. Status code: {response.status_code}. Response: {response.text}")
+
+    @instrumentation.timed('DataGeneration.parse_candles')
+    def parse_candles(self, data):
+        """
+        Parse the complete candles of a candles endpoint response into typed column arrays.
+
+        All price strings of the response are converted by a single NumPy call into one
+        (candles, price columns) float64 block, avoiding a dict and a str per value.
+
+        Returns:
+            dict: 'time' (datetime64[ns], UTC), 'volume' (int64) and 'prices' (float64
+            block ordered like `price_columns`).
+        """
+        candles = [candle for candle in data['candles'] if candle['complete']]
+        instrumentation.count('candles parsed', len(candles))
+        ohlc = itemgetter('o', 'h', 'l', 'c')
+        prices = np.array(
+            [value for candle in candles for price in self.prices_list for value in ohlc(candle[price])],
+            dtype=np.float64,
+        )
+        return {
+            'time': np.array([candle['time'].rstrip('Z') for candle in candles], dtype='datetime64[ns]'),
+            'volume': np.fromiter((candle['volume'] for candle in candles), dtype=np.int64, count=len(candles)),
+            'prices': prices.reshape(len(candles), len(self.price_columns)),
+        }
+
+    @instrumentation.timed('DataGeneration.get_instruments_df')
+    def get_instruments_df(self, start_time=None, end_time=None):
+        """
+        Download [start_time, end_time) chunk by chunk and return the candles as one DataFrame.
+
+        Columns are already typed: 'time' is datetime64[ns, UTC], 'volume' int64 and
+        every price column float64, so downstream numeric coercion is a no-op.
+
+        `start_time` and `end_time` default to the ones given to the constructor.
+
+        With `max_workers` > 1 every chunk is planned up front and fetched on a bounded
+        thread pool, one session per thread; chunks are reassembled in time order.
+        """
+        chunks = self.plan_chunks(start_time, end_time)
+
+        if self.max_workers > 1:
+            with ThreadPoolExecutor(self.max_workers) as pool:
+                parsed = list(pool.map(self.fetch_chunk, chunks))
+        else:
+            parsed = []
+            for chunk in chunks:
+                instrumentation.log(f"Requesting data from {chunk[0]} to {chunk[1]}")
+                parsed.append(self.fetch_chunk(chunk, self.session))
 
         # Concatenate all the data into a single DataFrame
-        return pd.DataFrame.from_records(all_data)
+        return self.columns_to_df(parsed)
+
+    def iter_candles(self, start_time=None, end_time=None):
+        """
+        Yield the candles of [start_time, end_time) one dict at a time, for streaming backtests.
+
+        Chunks are fetched lazily, so only one `MaxReturnedCandleLimit` chunk is held in memory.
+        """
+        for chunk in self.plan_chunks(start_time, end_time):
+            yield from self.columns_to_df([self.fetch_chunk(chunk, self.session)]).to_dict('records')
+
+    @instrumentation.timed('DataGeneration.columns_to_df')
+    def columns_to_df(self, parsed):
+        """Assemble `parse_candles` outputs, in time order, into one typed DataFrame."""
+        import pandas as pd
+
+        parsed = parsed or [self.parse_candles({'candles': []})]
+        df = pd.DataFrame(np.concatenate([columns['prices'] for columns in parsed]), columns=self.price_columns)
+        df.insert(0, 'volume', np.concatenate([columns['volume'] for columns in parsed]))
+        times = np.concatenate([columns['time'] for columns in parsed])
+        df.insert(0, 'time', pd.DatetimeIndex(times).tz_localize('UTC'))
+        return df
@@ -0,0 +1,199 @@
+import functools
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager, nullcontext
+
+_disabled_timer = nullcontext()
+
+
+class InstrumentationReport:
+    def __init__(self, timers, counters, messages, profile=None, memory=None):
+        """
+        Snapshot of what an `Instrumentation` recorded.
+
+        Args:
+            timers (dict): Stage name to {'calls', 'seconds'}.
+            counters (dict): Counter name to its total.
+            messages (list of str): Debug messages, oldest first.
+            profile (str): cProfile statistics sorted by cumulative time, if captured.
+            memory (dict): 'peak_bytes' and 'top' allocation sites, if traced.
+        """
+        self.timers = timers
+        self.counters = counters
+        self.messages = messages
+        self.profile = profile
+        self.memory = memory
+
+    def to_dict(self):
+        return {
+            'timers': self.timers,
+            'counters': self.counters,
+            'messages': self.messages,
+            'profile': self.profile,
+            'memory': self.memory,
+        }
+
+    def __str__(self):
+        lines = [f"{'stage':<32} {'calls':>8} {'seconds':>12}"]
+        for name, timer in sorted(self.timers.items(), key=lambda item: -item[1]['seconds']):
+            lines.append(f"{name:<32} {timer['calls']:>8} {timer['seconds']:>12.6f}")
+        for name, value in sorted(self.counters.items()):
+            lines.append(f"{name:<32} {value:>8}")
+        if self.memory is not None:
+            lines.append(f"{'peak traced memory (MiB)':<32} {self.memory['peak_bytes'] / 2 ** 20:>8.1f}")
+        if self.profile:
+            lines.append(self.profile)
+        return "\n".join(lines)
+
+
+class Instrumentation:
+    def __init__(self, max_messages=1000):
+        """
+        Opt-in stage timers, counters and debug messages for the data, indicator and
+        strategy hot paths, with optional cProfile and tracemalloc capture.
+
+        While disabled every call returns immediately, so the hooks can stay in
+        production code.
+
+        Args:
+            max_messages (int): Number of most recent debug messages kept.
+        """
+        self.enabled = False
+        self.max_messages = max_messages
+        self._lock = threading.Lock()
+        self._profiler = None
+        self._trace_memory = False
+        self.reset()
+
+    def reset(self):
+        """Forget everything recorded so far."""
+        self.timers = {}
+        self.counters = {}
+        self.messages = deque(maxlen=self.max_messages)
+        self.profile = None
+        self.memory = None
+
+    def enable(self, profile=False, trace_memory=False):
+        """
+        Start recording.
+
+        Args:
+            profile (bool): Also run cProfile over the calling thread.
+            trace_memory (bool): Also trace allocations with tracemalloc.
+        """
+        import cProfile
+        import tracemalloc
+
+        self.enabled = True
+        if profile:
+            self._profiler = cProfile.Profile()
+            self._profiler.enable()
+        if trace_memory and not tracemalloc.is_tracing():
+            self._trace_memory = True
+            tracemalloc.start()
+
+    def disable(self, top=20):
+        """Stop recording and keep the profile and memory statistics for `report`."""
+        import io
+        import pstats
+        import tracemalloc
+
+        self.enabled = False
+        if self._profiler is not None:
+            self._profiler.disable()
+            stream = io.StringIO()
+            pstats.Stats(self._profiler, stream=stream).sort_stats('cumulative').print_stats(top)
+            self.profile = stream.getvalue()
+            self._profiler = None
+        if self._trace_memory:
+            _, peak = tracemalloc.get_traced_memory()
+            sites = tracemalloc.take_snapshot().statistics('lineno')[:top]
+            tracemalloc.stop()
+            self._trace_memory = False
+            self.memory = {'peak_bytes': peak, 'top': [str(site) for site in sites]}
+
+    @contextmanager
+    def capture(self, profile=False, trace_memory=False):
+        """Record only the enclosed block, starting from an empty report."""
+        self.reset()
+        self.enable(profile, trace_memory)
+        try:
+            yield self
+        finally:
+            self.disable()
+
+    def timer(self, name):
+        """Context manager adding the wall time of the enclosed block to the `name` stage."""
+        if not self.enabled:
+            return _disabled_timer
+        return self._timed(name)
+
+    @contextmanager
+    def _timed(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            with self._lock:
+                timer = self.timers.setdefault(name, {'calls': 0, 'seconds': 0.0})
+                timer['calls'] += 1
+                timer['seconds'] += elapsed
+
+    def timed(self, name):
+        """Decorator timing every call of a function as the `name` stage."""
+        def decorator(func):
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return func(*args, **kwargs)
+                with self._timed(name):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def count(self, name, value=1):
+        """Add `value` to the `name` counter."""
+        if not self.enabled:
+            return
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def log(self, message):
+        """Record a debug message."""
+        if self.enabled:
+            self.messages.append(message)
+
+    def merge(self, report):
+        """Add the timers, counters and messages of a report, e.g. one recorded in a worker process."""
+        if not self.enabled:
+            return
+        with self._lock:
+            for name, timer in report.timers.items():
+                total = self.timers.setdefault(name, {'calls': 0, 'seconds': 0.0})
+                total['calls'] += timer['calls']
+                total['seconds'] += timer['seconds']
+            for name, value in report.counters.items():
+                self.counters[name] = self.counters.get(name, 0) + value
+            self.messages.extend(report.messages)
+
+    def report(self):
+        """Return an `InstrumentationReport` of what was recorded."""
+        with self._lock:
+            return InstrumentationReport(
+                {name: dict(timer) for name, timer in self.timers.items()},
+                dict(self.counters),
+                list(self.messages),
+                self.profile,
+                self.memory,
+            )
+
+
+# Shared by DataGeneration, the indicators and the strategies
+instrumentation = Instrumentation()
+
+# Example usage:
+# with instrumentation.capture(profile=True):
+#     trade_log_df = MACrossover(data, initial_capital=10000).run_strategy(20, 50)
+# print(instrumentation.report())
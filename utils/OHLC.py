@@ -0,0 +1,148 @@
+import numpy as np
+
+
+class OHLC:
+    __slots__ = ('time', 'columns', 'tz')
+
+    def __init__(self, time, columns, tz=None):
+        """
+        Array-backed candles: one 'time' array and named 1-D numeric columns of equal length.
+
+        Indicators append their results as new columns with `add`; the arrays already
+        held are never written to, so several indicators and strategies can share the
+        same base data without copying it.
+
+        Args:
+            time (array-like): Candle times; with `tz`, naive datetime64 in UTC.
+            columns (dict): Column name to a 1-D numeric array, e.g. 'bid_c' or 'ATR15'.
+            tz: Time zone of the times, restored by `to_df`.
+        """
+        self.time = np.asarray(time)
+        self.tz = tz
+        self.columns = {}
+        for name, values in columns.items():
+            self.add(name, values)
+
+    @classmethod
+    def from_df(cls, df, columns=None):
+        """
+        Wrap the columns of a DataFrame, e.g. `DataGeneration.get_instruments_df` output.
+
+        Numeric columns are taken as views, without copying; other columns (such as
+        price strings) are converted with `pd.to_numeric` into float64. A time-zone
+        aware 'time' column is kept as a datetime64 view of its UTC values, its time
+        zone in `tz`, rather than as an object array of Timestamps.
+
+        Args:
+            df (pd.DataFrame): Candles with a 'time' column.
+            columns (iterable of str): Columns to wrap; defaults to every column but 'time'.
+        """
+        import pandas as pd
+
+        if columns is None:
+            columns = [col for col in df.columns if col != 'time']
+        arrays = {}
+        for name in columns:
+            series = df[name]
+            if not pd.api.types.is_numeric_dtype(series.dtype):
+                series = pd.to_numeric(series, errors='coerce')
+            arrays[name] = series.to_numpy()
+        time = df['time']
+        tz = getattr(time.dtype, 'tz', None)
+        if tz is not None:
+            return cls(time.array.asi8.view(f'datetime64[{time.dt.unit}]'), arrays, tz)
+        return cls(time.to_numpy(), arrays)
+
+    def __len__(self):
+        return len(self.time)
+
+    def __contains__(self, name):
+        return name == 'time' or name in self.columns
+
+    def __getitem__(self, name):
+        """Return a read-only view of the 'time' array or of a column."""
+        values = self.time if name == 'time' else self.columns[name]
+        view = values.view()
+        view.flags.writeable = False
+        return view
+
+    def add(self, name, values):
+        """Append (or replace) the column `name` and return the container."""
+        values = np.asarray(values)
+        if values.shape != self.time.shape:
+            raise ValueError(f"Column {name} has shape {values.shape}, expected {self.time.shape}.")
+        self.columns[name] = values
+        return self
+
+    def valid(self, names=None):
+        """Return the mask of the rows without NaN in `names` (every column by default)."""
+        mask = np.ones(len(self), dtype=bool)
+        for name in self.columns if names is None else names:
+            values = self.columns[name]
+            if values.dtype.kind in 'fc':
+                mask &= ~np.isnan(values)
+        return mask
+
+    def select(self, names):
+        """Return a new container sharing the arrays of the `names` columns."""
+        return OHLC(self.time, {name: self.columns[name] for name in names}, self.tz)
+
+    def take(self, rows):
+        """Return a new container with the selected rows (a boolean mask or positions)."""
+        return OHLC(self.time[rows], {name: values[rows] for name, values in self.columns.items()}, self.tz)
+
+    def to_df(self):
+        """Return the candles as a DataFrame."""
+        import pandas as pd
+
+        time = self.time
+        if self.tz is not None:
+            time = pd.DatetimeIndex(time).tz_localize('UTC').tz_convert(self.tz)
+        return pd.DataFrame({'time': time, **self.columns})
+
+
+def share(data):
+    """
+    Copy the arrays of an `OHLC` into one shared memory block, for worker processes.
+
+    Object arrays (e.g. time strings) can't live in shared memory and are carried
+    by the returned spec instead.
+
+    Returns:
+        tuple: (SharedMemory, spec). Pass the spec to `attach` in the workers; close and
+        unlink the block once they are done.
+    """
+    from multiprocessing import shared_memory
+
+    arrays = {'time': data.time, **data.columns}
+    layout, objects, size = {}, {}, 0
+    for name, values in arrays.items():
+        if values.dtype == object:
+            objects[name] = values
+        else:
+            layout[name] = (size, values.dtype.str, values.shape)
+            size += -(-values.nbytes // 8) * 8  # Keep every array 8-byte aligned
+    block = shared_memory.SharedMemory(create=True, size=max(size, 1))
+    for name, (offset, dtype, shape) in layout.items():
+        np.ndarray(shape, dtype, buffer=block.buf, offset=offset)[...] = arrays[name]
+    return block, (block.name, layout, objects, data.tz)
+
+
+def attach(spec):
+    """
+    Open an `OHLC` shared by `share` in another process.
+
+    Returns:
+        tuple: (SharedMemory, OHLC of read-only views into it); keep the block
+        referenced, and open, as long as the container is used.
+    """
+    from multiprocessing import shared_memory
+
+    name, layout, objects, tz = spec
+    block = shared_memory.SharedMemory(name=name)
+    arrays = dict(objects)
+    for column, (offset, dtype, shape) in layout.items():
+        arrays[column] = np.ndarray(shape, dtype, buffer=block.buf, offset=offset)
+        arrays[column].flags.writeable = False
+    time = arrays.pop('time')
+    return block, OHLC(time, arrays, tz)
@@ -0,0 +1,123 @@
+import numpy as np
+import pandas as pd
+
+from utils.OHLC import OHLC
+from utils.TimeFrames import time_frame_to_seconds, time_ns
+
+
+class Resampler:
+    time_frame_to_seconds = time_frame_to_seconds
+
+    def __init__(self, base_time_frame='M5', offset=0):
+        """
+        Build coarser candles from one fine-grained series and find gaps in it.
+
+        Args:
+            base_time_frame (str): Granularity of the series, e.g. 'M5' or 'S5'.
+            offset (int): Seconds added to the UTC-aligned bucket boundaries, e.g. to
+                start daily candles at 21:00 UTC (offset=-10800).
+        """
+        if base_time_frame not in self.time_frame_to_seconds:
+            raise ValueError(f"Unsupported time frame: {base_time_frame}")
+        self.base_time_frame = base_time_frame
+        self.offset = offset
+
+    def _seconds(self, time_frame):
+        if time_frame not in self.time_frame_to_seconds:
+            raise ValueError(f"Unsupported time frame: {time_frame}")
+        seconds = self.time_frame_to_seconds[time_frame]
+        if seconds % self.time_frame_to_seconds[self.base_time_frame]:
+            raise ValueError(f"{time_frame} is not a multiple of {self.base_time_frame}.")
+        return seconds
+
+    def resample(self, df, time_frame):
+        """
+        Aggregate the candles of `df` into `time_frame` candles.
+
+        Every price component present ('mid', 'bid', 'ask') gets its first open, highest
+        high, lowest low and last close per bucket; volumes are summed. Buckets without
+        any base candle are not created, so gaps stay gaps. Other columns, such as
+        indicators, can't be aggregated and raise ValueError: compute them on the
+        resampled candles instead.
+
+        Args:
+            df (pd.DataFrame or OHLC): Time-ordered candles with 'time' and '<price>_<o/h/l/c>' columns.
+            time_frame (str): Target granularity, a multiple of `base_time_frame`.
+
+        Returns:
+            pd.DataFrame or OHLC (as given): The resampled candles, time at the bucket start.
+        """
+        data = df if isinstance(df, OHLC) else OHLC.from_df(df)
+        other = [name for name in data.columns
+                 if name != 'volume' and name.rsplit('_', 1)[-1] not in ('o', 'h', 'l', 'c')]
+        if other:
+            raise ValueError(f"Can't resample the columns {other}; compute them on the resampled candles.")
+        bucket_ns = self._seconds(time_frame) * 10 ** 9
+        offset_ns = self.offset * 10 ** 9
+        if not len(data):
+            raise ValueError("No candles to resample.")
+        buckets = (time_ns(data.time) - offset_ns) // bucket_ns
+
+        # First and last row of every bucket
+        starts = np.flatnonzero(np.r_[True, buckets[1:] != buckets[:-1]])
+        ends = np.r_[starts[1:], len(buckets)] - 1
+
+        columns = {}
+        for name, values in data.columns.items():
+            kind = name.rsplit('_', 1)[-1]
+            if name == 'volume':
+                columns[name] = np.add.reduceat(values, starts)
+            elif kind == 'o':
+                columns[name] = values[starts]
+            elif kind == 'c':
+                columns[name] = values[ends]
+            elif kind == 'h':
+                columns[name] = np.fmax.reduceat(values, starts)
+            elif kind == 'l':
+                columns[name] = np.fmin.reduceat(values, starts)
+        time = pd.to_datetime(buckets[starts] * bucket_ns + offset_ns, utc=True)
+
+        result = OHLC(time.tz_localize(None).to_numpy(), columns, time.tz)
+        if isinstance(df, OHLC):
+            return result
+        return pd.DataFrame({'time': time, **columns})
+
+    def resample_many(self, df, time_frames):
+        """Return {time_frame: resampled candles} for several target granularities."""
+        return {time_frame: self.resample(df, time_frame) for time_frame in time_frames}
+
+    def find_gaps(self, df, min_missing=1):
+        """
+        Report every place where at least `min_missing` base candles are missing.
+
+        Returns:
+            pd.DataFrame: One row per gap with the last candle before it ('Start'), the first
+            candle after it ('End'), 'Missing Candles', 'Duration' and whether the gap spans
+            a Saturday ('Weekend'), when FX markets are closed.
+        """
+        time = np.asarray(df['time'])
+        ns = time_ns(time)
+        step_ns = self.time_frame_to_seconds[self.base_time_frame] * 10 ** 9
+        missing = np.diff(ns) // step_ns - 1
+        at = np.flatnonzero(missing >= min_missing)
+
+        # 1970-01-01 was a Thursday, so days d with d % 7 == 2 are Saturdays
+        day_ns = 86400 * 10 ** 9
+        first_day, last_day = ns[at] // day_ns, ns[at + 1] // day_ns
+        saturdays = (last_day - 2) // 7 - (first_day - 3) // 7
+
+        return pd.DataFrame({
+            'Start': pd.to_datetime(ns[at], utc=True),
+            'End': pd.to_datetime(ns[at + 1], utc=True),
+            'Missing Candles': missing[at],
+            'Duration': pd.to_timedelta(ns[at + 1] - ns[at], unit='ns'),
+            'Weekend': saturdays > 0,
+        })
+
+
+# Example usage:
+# m5 = CandleCache().get_instruments_df(DataGeneration('EUR_USD', 'M5', start_time=start, end_time=end))
+# resampler = Resampler('M5')
+# frames = resampler.resample_many(m5, ['M15', 'H1', 'H4'])
+# gaps = resampler.find_gaps(m5)
+# print(gaps[~gaps['Weekend']])
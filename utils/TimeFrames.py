@@ -0,0 +1,32 @@
+import numpy as np
+
+# Seconds per candle of every granularity of the candles API
+time_frame_to_seconds = {
+    'S5': 5,
+    'S10': 10,
+    'S15': 15,
+    'S30': 30,
+    'M1': 60,
+    'M2': 120,
+    'M5': 300,
+    'M15': 900,
+    'M30': 1800,
+    'H1': 3600,
+    'H4': 14400,
+    'D': 86400
+}
+
+
+def time_ns(time):
+    """
+    Candle times as int64 nanoseconds since the epoch, UTC.
+
+    Naive datetime64 arrays, the form `OHLC` stores, are taken as UTC and converted
+    without pandas; anything else (strings, datetimes, pd.Timestamps, tz-aware columns)
+    goes through `pd.to_datetime(utc=True)`.
+    """
+    if isinstance(time, np.ndarray) and time.dtype.kind == 'M':
+        return time.astype('datetime64[ns]').view(np.int64)
+    import pandas as pd
+
+    return pd.DatetimeIndex(pd.to_datetime(time, utc=True)).as_unit('ns').asi8